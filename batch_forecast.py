@@ -0,0 +1,87 @@
+import argparse
+import importlib.util
+import os
+import time
+
+from climatology import CLIMATE_YEARS, Climatology
+from rainfall_engine import FORECAST_PARAMS, SITES, add_climate, alert_table, fetch_forecasts, forecast_tables
+from site_registry import SiteRegistry
+
+# Fetches every site in the site registry and writes hourly and daily tables:
+#
+#   python batch_forecast.py --output-dir out --format parquet
+#   python batch_forecast.py --near 17.0,82.2 --radius 50
+#   python batch_forecast.py --climatology --climate-years 10
+
+
+# Parquet needs pyarrow or fastparquet, which are not in requirements.txt.
+PARQUET_ENGINES = ("pyarrow", "fastparquet")
+
+
+def parquet_available():
+    return any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES)
+
+
+def write_table(df, path, fmt):
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def coordinate(text):
+    lat, lon = (float(x) for x in text.split(","))
+    return lat, lon
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and aggregate rainfall forecasts for every site.")
+    parser.add_argument("--output-dir", default="forecast_output")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--sites", nargs="*", help="site names to include (default: all)")
+    parser.add_argument("--sites-file", help="site registry CSV (default: sites.csv)")
+    parser.add_argument("--near", type=coordinate, metavar="LAT,LON", help="only sites near this point")
+    parser.add_argument("--radius", type=float, default=50.0, help="km around --near (default 50)")
+    parser.add_argument("--params", default=FORECAST_PARAMS, help="Open-Meteo query parameters")
+    parser.add_argument("--workers", type=int, default=4, help="parallel fetch requests")
+    parser.add_argument("--climatology", action="store_true", help="flag days unusual for the site and season")
+    parser.add_argument("--climate-years", type=int, default=CLIMATE_YEARS, help="archive years per climatology")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="aggregation processes")
+    args = parser.parse_args()
+    # Checked before fetching, so a nightly run cannot fail after all the work is done.
+    if args.format == "parquet" and not parquet_available():
+        parser.error("--format parquet needs pyarrow or fastparquet installed")
+
+    registry = SiteRegistry.from_file(args.sites_file) if args.sites_file else SITES
+    places = registry.places
+    if args.near:
+        places = {name: places[name] for name, _ in registry.within(*args.near, args.radius)}
+        if not places:
+            parser.error(f"no sites within {args.radius:g} km of {args.near[0]},{args.near[1]}")
+    if args.sites:
+        unknown = set(args.sites) - set(places)
+        if unknown:
+            parser.error(f"unknown sites: {', '.join(sorted(unknown))}")
+        places = {name: places[name] for name in args.sites}
+
+    start = time.perf_counter()
+    payloads = fetch_forecasts(places.values(), args.params, args.workers)
+    fetched = time.perf_counter()
+    hourly, daily = forecast_tables(places, payloads, args.processes)
+    alerts = alert_table(places, payloads)
+    if args.climatology:
+        daily = add_climate(daily, Climatology(years=args.climate_years))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    write_table(hourly, os.path.join(args.output_dir, f"hourly.{args.format}"), args.format)
+    write_table(daily, os.path.join(args.output_dir, f"daily.{args.format}"), args.format)
+    write_table(alerts, os.path.join(args.output_dir, f"alerts.{args.format}"), args.format)
+    print(
+        f"{len(places)} sites ({len(payloads)} unique locations, {len(alerts)} alerts): "
+        f"fetched in {fetched - start:.2f}s, built in {time.perf_counter() - fetched:.2f}s "
+        f"-> {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
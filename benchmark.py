@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from calendar_html import calendar_grid_html, hourly_grid_html
+from climatology import Climatology, flag_days
+from rain_alerts import alert_events
+from rain_stats import (
+    RAIN_COLORS, RAIN_THRESHOLDS, build_ensemble, build_forecast, day_slice, hourly_frame,
+    overview_frame, rain_class, rain_color, rain_colors,
+)
+
+# Offline benchmarks for the fetch-parse-aggregate-render pipeline, driven by
+# the recorded Open-Meteo responses in fixtures/:
+#
+#   python benchmark.py --output bench.json
+#   python benchmark.py --output new.json --compare bench.json
+#
+# Each dimension (forecast days, sites, ensemble members) is swept on its own
+# with the others held at their first value.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE = os.path.join(FIXTURE_DIR, "forecast", "default.json")
+ARCHIVE_FIXTURE = os.path.join(FIXTURE_DIR, "archive", "default.json")
+
+
+# ---------- HELPERS ----------
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_hourly(series, hours, seed=0):
+    rng = np.random.default_rng(seed)
+    wet = rng.random((series, hours)) < 0.3
+    return np.where(wet, np.round(rng.exponential(3.0, (series, hours)), 1), 0.0)
+
+
+# ---------- FIXTURES ----------
+def load_recording():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+
+def stretch_payload(recording, days, members, seed=0):
+    # Tiles the recorded hourly series out to `days` and adds ensemble members
+    # as precipitation_memberNN columns, the way the ensemble API names them.
+    hours = days * 24
+    recorded = np.array(recording["hourly"]["precipitation"], dtype=float)
+    base = np.resize(recorded, hours)
+    start = datetime.fromisoformat(recording["hourly"]["time"][0])
+    hourly = {
+        "time": [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)],
+        "precipitation": base.tolist(),
+    }
+    rng = np.random.default_rng(seed)
+    for member in range(1, members):
+        noise = rng.gamma(2.0, 0.5, hours)
+        hourly[f"precipitation_member{member:02d}"] = np.round(base * noise, 1).tolist()
+    return {**recording, "hourly": hourly}
+
+
+# ---------- STAGES ----------
+def legacy_hourly_frame(data):
+    # The frame main() used to build: every time string parsed, float64 values
+    # and a python date object per hour.
+    df = pd.DataFrame(data["hourly"])
+    df["time"] = pd.to_datetime(df["time"])
+    df["date"] = df["time"].dt.date
+    df["hour"] = df["time"].dt.hour
+    return df
+
+
+def legacy_daily_totals(df):
+    # What main() used to do: one boolean filter over the whole frame per day.
+    return {day: df[df["date"] == day]["precipitation"].sum() for day in df["date"].unique()}
+
+
+def member_daily_totals(payload):
+    hourly = payload["hourly"]
+    names = [key for key in hourly if key.startswith("precipitation")]
+    members = np.array([hourly[name] for name in names], dtype=float)
+    return np.nansum(members.reshape(len(names), -1, 24), axis=2)
+
+
+def render_html(forecast):
+    calendar_grid_html(forecast["daily"], "Benchmark")
+    for day in forecast["daily"].index:
+        hourly_grid_html(day_slice(forecast, day))
+
+
+def time_stages(payload, sites, repeat):
+    encoded = json.dumps([payload] * sites)
+    decoded = json.loads(encoded)
+    frames = [legacy_hourly_frame(p) for p in decoded]
+    forecasts = [build_forecast(p) for p in decoded]
+    values = [f["hourly"]["precipitation"].tolist() for f in forecasts]
+    arrays = [f["hourly"]["precipitation"].to_numpy() for f in forecasts]
+    return {
+        "json_decode": best_of(lambda: json.loads(encoded), repeat),
+        "legacy_dataframe_build": best_of(lambda: [legacy_hourly_frame(p) for p in decoded], repeat),
+        "dataframe_build": best_of(lambda: [hourly_frame(p) for p in decoded], repeat),
+        "legacy_day_filter": best_of(lambda: [legacy_daily_totals(df) for df in frames], repeat),
+        "aggregate": best_of(lambda: [build_forecast(p) for p in decoded], repeat),
+        "member_daily_totals": best_of(lambda: [member_daily_totals(p) for p in decoded], repeat),
+        "ensemble_stats": best_of(lambda: [build_ensemble(p) for p in decoded], repeat),
+        "rain_color_scalar": best_of(lambda: [[rain_color(v) for v in vs] for vs in values], repeat),
+        "rain_colors_vector": best_of(lambda: [rain_colors(a) for a in arrays], repeat),
+        "html_render": best_of(lambda: [render_html(f) for f in forecasts], repeat),
+        "rolling_alerts": best_of(lambda: alert_events(range(sites), decoded), repeat),
+    }
+
+
+def sweep(days_list, sites_list, members_list, repeat):
+    recording = load_recording()
+    base = (days_list[0], sites_list[0], members_list[0])
+    configs = {base}
+    configs.update((d, base[1], base[2]) for d in days_list)
+    configs.update((base[0], s, base[2]) for s in sites_list)
+    configs.update((base[0], base[1], m) for m in members_list)
+    results = []
+    for days, sites, members in sorted(configs):
+        payload = stretch_payload(recording, days, members)
+        for stage, seconds in time_stages(payload, sites, repeat).items():
+            results.append({
+                "days": days, "sites": sites, "members": members,
+                "stage": stage, "seconds": seconds,
+            })
+        print(f"  days={days} sites={sites} members={members}", file=sys.stderr)
+    return results
+
+
+# ---------- INTENSITY CLASSIFIER ----------
+def classifier_inputs():
+    # Every threshold, the floats either side of it, every 0.01 mm up to past
+    # Extreme, and the values rain_color sends to its else branch.
+    edges = RAIN_THRESHOLDS
+    return np.concatenate([
+        np.nextafter(edges, -np.inf),
+        edges,
+        np.nextafter(edges, np.inf),
+        np.round(np.arange(0, 300.01, 0.01), 2),
+        [-1.0, -0.0, np.nan, np.inf, -np.inf, 1e6],
+    ])
+
+
+def check_rain_class():
+    values = classifier_inputs()
+    expected = np.array([rain_color(v) for v in values.tolist()])
+    got = RAIN_COLORS[rain_class(values)]
+    mismatched = values[expected != got]
+    if mismatched.size:
+        raise AssertionError(f"rain_class disagrees with rain_color at {mismatched[:10].tolist()}")
+    return int(values.size)
+
+
+def bench_rain_class(series, hours):
+    flat = synthetic_hourly(series, hours).ravel()
+    values = flat.tolist()
+    scalar = best_of(lambda: [rain_color(v) for v in values], repeat=3)
+    vector = best_of(lambda: rain_colors(flat))
+    return {
+        "values": int(flat.size),
+        "rain_color_s": scalar,
+        "rain_colors_s": vector,
+        "speedup": scalar / vector if vector else None,
+    }
+
+
+# ---------- OVERVIEW ----------
+def staggered_payloads(recording):
+    # The recording as served fresh, two days stale, starting mid-day, and
+    # with one hour missing (a 23-hour day).
+    hourly = recording["hourly"]
+    start = datetime.fromisoformat(hourly["time"][0])
+    stale = [(start - timedelta(days=2) + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(len(hourly["time"]))]
+    gap = 24 * 3 + 2
+    return [
+        recording,
+        {**recording, "hourly": {**hourly, "time": stale}},
+        {**recording, "hourly": {key: values[5:] for key, values in hourly.items()}},
+        {**recording, "hourly": {key: values[:gap] + values[gap + 1:] for key, values in hourly.items()}},
+    ]
+
+
+def check_overview():
+    # Every overview cell must match that site's own daily total.
+    payloads = staggered_payloads(load_recording())
+    frame = overview_frame(range(len(payloads)), payloads)
+    got = {(site, date.date()): rain for site, date, rain in zip(frame["Site"], frame["Date"], frame["Rainfall (mm)"])}
+    expected = {
+        (site, day): round(rain, 1)
+        for site, payload in enumerate(payloads)
+        for day, rain in build_forecast(payload)["daily"]["precipitation"].items()
+    }
+    if got != expected:
+        wrong = sorted(set(got.items()) ^ set(expected.items()))[:10]
+        raise AssertionError(f"overview_frame disagrees with build_forecast at {wrong}")
+    return len(expected)
+
+
+# ---------- CLIMATOLOGY ----------
+def archive_range(lat, lon, start_date, end_date):
+    # fetch_archive_daily, answered from the recorded archive response.
+    with open(ARCHIVE_FIXTURE) as f:
+        daily = json.load(f)["daily"]
+    return [(day, rain) for day, rain in zip(daily["time"], daily["precipitation_sum"]) if start_date <= day <= end_date]
+
+
+def check_climatology():
+    # A climatology read back from its file must flag days exactly as the one
+    # just built in memory, as it is after a restart.
+    today = date(2026, 10, 17)
+    days = pd.date_range(today, periods=14)
+    amounts = np.array([0.0, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0, 80.0, 120.0, 160.0, 200.0, 250.0, 300.0])
+    with tempfile.TemporaryDirectory() as directory:
+        built = Climatology(directory, archive_range).load(22.375, 69.875, today)
+        stored = Climatology(directory, archive_range)
+        loaded = stored.read(22.375, 69.875)
+        if not stored.current(loaded, today):
+            raise AssertionError("stored climatology reads back as out of date")
+        expected = flag_days(built, days, amounts)
+        got = flag_days(loaded, days, amounts)
+    if not got.equals(expected):
+        raise AssertionError(f"stored climatology flags differently:\n{got.compare(expected)}")
+    return len(got)
+
+
+# ---------- REGRESSIONS ----------
+# A stage is only flagged when it is both `tolerance` slower and `min_delta`
+# seconds slower: microsecond stages swing by more than 25% from run to run.
+MIN_DELTA = 0.001
+
+
+def compare(results, baseline_path, tolerance, min_delta=MIN_DELTA):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["days"], r["sites"], r["members"], r["stage"])
+    previous = {key(r): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        before = previous.get(key(r))
+        if before and r["seconds"] > before * (1 + tolerance) and r["seconds"] - before > min_delta:
+            regressions.append({**r, "baseline_seconds": before, "ratio": r["seconds"] / before})
+    return regressions
+
+
+# ---------- ENTRY POINT ----------
+def int_list(text):
+    return [int(x) for x in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rainfall forecast pipeline offline.")
+    parser.add_argument("--days", type=int_list, default=[14, 21, 28, 35], help="forecast horizons to sweep")
+    parser.add_argument("--sites", type=int_list, default=[1, 10, 100, 500], help="site counts to sweep")
+    parser.add_argument("--members", type=int_list, default=[1, 11, 31], help="ensemble member counts to sweep")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repeats per stage")
+    parser.add_argument("--series", type=int, default=1000, help="synthetic hourly series for the classifier")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA, help="ignore slowdowns under this many seconds")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "rain_class_checked": check_rain_class(),
+        "overview_checked": check_overview(),
+        "climatology_checked": check_climatology(),
+        "rain_class": bench_rain_class(args.series, 336),
+        "results": sweep(args.days, args.sites, args.members, args.repeat),
+    }
+    if args.compare:
+        report["regressions"] = compare(report["results"], args.compare, args.tolerance, args.min_delta)
+        for r in report["regressions"]:
+            print(
+                f"REGRESSION {r['stage']} days={r['days']} sites={r['sites']} members={r['members']}: "
+                f"{r['baseline_seconds']:.4f}s -> {r['seconds']:.4f}s ({r['ratio']:.2f}x)",
+                file=sys.stderr,
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from html import escape
+from urllib.parse import urlencode
+
+# ---------- STATIC FRAGMENTS ----------
+# Built once per process; every rerun sends the same strings.
+PAGE_CSS = """<style>
+        .calendar-box, .hour-box {
+            border-radius: 10px;
+            padding: 10px;
+            margin-bottom: 10px;
+            box-shadow: 0 2px 6px rgba(0,0,0,0.1);
+        }
+        .hour-box {
+            text-align: center;
+            font-size: 14px;
+            font-weight: 500;
+        }
+        .rain-bar {
+            height: 6px;
+            border-radius: 4px;
+            margin-top: 4px;
+        }
+        .hour-grid {
+            display: grid;
+            grid-template-columns: repeat(6, 1fr);
+            column-gap: 16px;
+        }
+        .calendar-grid {
+            display: grid;
+            grid-template-columns: repeat(7, 1fr);
+            gap: 12px;
+        }
+        .day-cell {
+            display: block;
+            padding: 8px 10px;
+            border: 1px solid rgba(49,51,63,0.2);
+            border-radius: 8px;
+            color: inherit !important;
+            text-decoration: none !important;
+            text-align: center;
+            font-size: 14px;
+        }
+        .day-cell:hover {
+            border-color: #FF4B4B;
+        }
+        .ensemble, .climate {
+            display: block;
+            font-size: 12px;
+            opacity: 0.8;
+        }
+    </style>"""
+
+LEGEND_HTML = """
+    <div style="display: flex; width: 100%; max-width: 1000px; margin: auto; flex-wrap: wrap;">
+      <div style="flex: 1; background-color: #D3D3D3; padding: 10px; text-align: center; font-size: 12px; font-weight: bold; border-radius: 6px 0 0 6px;">No Rain</div>
+      <div style="flex: 1; background-color: #ADD8E6; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Trace<br>(0.01–0.04)</div>
+      <div style="flex: 1; background-color: #A0C4FF; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Very Light<br>(0.1–2.4)</div>
+      <div style="flex: 1; background-color: #7FB77E; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Light<br>(2.5–7.5)</div>
+      <div style="flex: 1; background-color: #FFD700; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Moderate<br>(7.6–35.5)</div>
+      <div style="flex: 1; background-color: #FF8C00; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Rather Heavy<br>(35.6–64.4)</div>
+      <div style="flex: 1; background-color: #FF4500; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Heavy<br>(64.5–124.4)</div>
+      <div style="flex: 1; background-color: #DC143C; padding: 10px; text-align: center; font-size: 12px; font-weight: bold;">Very Heavy<br>(124.5–244.4)</div>
+      <div style="flex: 1; background-color: #8B0000; color: white; padding: 10px; text-align: center; font-size: 12px; font-weight: bold; border-radius: 0 6px 6px 0;">Extreme<br>(>244.4)</div>
+    </div>
+    """
+
+
+# ---------- CALENDAR GRID ----------
+# The whole 14-day calendar as one element. With links, each day links back
+# to the app with ?city=...&day=YYYY-MM-DD, which opens its hourly panel;
+# without, the cells are plain and the page opens days itself.
+def calendar_grid_html(daily, city, ensemble=None, climate=None, links=True):
+    notes = ensemble_notes(daily.index, ensemble) if ensemble else [""] * len(daily)
+    flags = climate_notes(daily.index, climate) if climate is not None else [""] * len(daily)
+    opens = [
+        f"<a class='day-cell' target='_self' href='?{escape(urlencode({'city': city, 'day': day.isoformat()}))}'>"
+        if links else "<div class='day-cell'>"
+        for day in daily.index
+    ]
+    close = "</a>" if links else "</div>"
+    cells = [
+        f"{open_tag}{day.strftime('%d')} {day.strftime('%b')}, {day.year}<br>🌧️ {rain:.1f} mm{note}{flag}"
+        f"<div class='rain-bar' style='background-color:{color};'></div>{close}"
+        for open_tag, day, rain, color, note, flag
+        in zip(opens, daily.index, daily["precipitation"], daily["color"], notes, flags)
+    ]
+    return "<div class='calendar-grid'>" + "".join(cells) + "</div>"
+
+
+# Chance of a rainy day (IMD: 2.5 mm or more) and the 10th-90th percentile
+# range under each day; the tooltip lists the chance of every class.
+def ensemble_notes(days, ensemble):
+    daily = ensemble["daily"].reindex(days)
+    exceedance = ensemble["exceedance"].reindex(days)
+    notes = []
+    for (_, row), (_, chances) in zip(daily.iterrows(), exceedance.iterrows()):
+        if row.isna().all():
+            notes.append("")
+            continue
+        title = " · ".join(f"{name}+ {p:.0%}" for name, p in chances.items())
+        notes.append(
+            f"<span class='ensemble' title='{escape(title)}'>"
+            f"🎲 {chances['Light']:.0%} · {row['p10']:.0f}–{row['p90']:.0f} mm</span>"
+        )
+    return notes
+
+
+# Days that are wet for the site and time of year: the highest return period
+# reached, else the percentile, with the seasonal normal in the tooltip.
+def climate_label(flag):
+    if flag.return_period:
+        return f"⚠️ 1-in-{flag.return_period}-yr"
+    return f"📈 p{flag.percentile}"
+
+
+def climate_title(flag):
+    return (
+        f"Wetter than {flag.percentile}% of days around this date in {flag.years}"
+        f" · median {flag.normal_mm:.1f} mm"
+    )
+
+
+def climate_notes(days, climate):
+    flags = climate.reindex(days)
+    return [
+        f"<span class='climate' title='{escape(climate_title(flag))}'>{climate_label(flag)}</span>"
+        if flagged else ""
+        for flag, flagged in zip(flags.itertuples(), flags["anomalous"].eq(True))
+    ]
+
+
+# ---------- HOURLY PANEL ----------
+# One HTML grid per day instead of one Streamlit element per hour.
+def hourly_grid_html(day_df):
+    boxes = (
+        "<div class='hour-box' style='background-color:" + day_df["color"].astype(str) + ";'>"
+        + "<b>" + day_df["time"].dt.strftime("%H:%M") + "</b><br>🌧️ "
+        + day_df["precipitation"].map("{:.1f}".format) + " mm</div>"
+    )
+    return "<div class='hour-grid'>" + "".join(boxes) + "</div>"
@@ -0,0 +1,44 @@
+import altair as alt
+
+from rain_stats import RAIN_CLASSES, RAIN_COLORS
+
+# Imported on first use by the dashboards (instrumentation.lazy_import), so
+# altair stays out of cold start.
+
+# ---------- ALL-SITES HEATMAP ----------
+# One chart for every site x day, coloured by IMD intensity class.
+def overview_heatmap(df):
+    sites = df["Site"].nunique()
+    return alt.Chart(df).mark_rect().encode(
+        x=alt.X("yearmonthdate(Date):O", title="Date", axis=alt.Axis(format="%d %b", labelAngle=0)),
+        y=alt.Y("Site:N", title=None, sort=None),
+        color=alt.Color(
+            "Intensity:N",
+            scale=alt.Scale(domain=list(RAIN_CLASSES), range=RAIN_COLORS.tolist()),
+            legend=alt.Legend(orient="bottom", columns=5),
+        ),
+        tooltip=["Site:N", alt.Tooltip("Date:T", format="%d %b %Y"), "Rainfall (mm):Q", "Intensity:N"],
+    ).properties(
+        width="container",
+        height=max(200, 22 * sites),
+        title="🗺️ Daily Rainfall by Site"
+    ).configure_title(fontSize=16).configure_axis(
+        labelFontSize=12,
+        titleFontSize=14
+    )
+
+
+# ---------- PAST RAINFALL ----------
+def past_rainfall_chart(df_past, days):
+    return alt.Chart(df_past).mark_bar(size=35 if days <= 15 else max(2, 540 // days)).encode(
+        x=alt.X("Date:T", title="Date"),
+        y=alt.Y("Rainfall (mm):Q", title="Rainfall (mm)"),
+        tooltip=["Date:T", "Rainfall (mm):Q"]
+    ).properties(
+        width="container",
+        height=300,
+        title=f"📉 Daily Rainfall Over Last {days} Days"
+    ).configure_title(fontSize=16).configure_axis(
+        labelFontSize=12,
+        titleFontSize=14
+    )
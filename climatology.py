@@ -0,0 +1,218 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import open_meteo
+from forecast_store import DEFAULT_PATH
+
+# ---------- CONFIG ----------
+# One file per site, built from the archive once and kept beside the forecast
+# cache. Rebuilt when it is more than REBUILD_AFTER days old, which only moves
+# the figures by one more year of data.
+CLIMATE_DIR = os.environ.get(
+    "RAINFALL_CLIMATE_DIR", os.path.join(os.path.dirname(DEFAULT_PATH), "climatology")
+)
+CLIMATE_YEARS = int(os.environ.get("RAINFALL_CLIMATE_YEARS", "10"))
+REBUILD_AFTER = 365
+
+CLIMATE_PERCENTILES = (50, 75, 90, 95, 99)
+RETURN_PERIODS = (2, 5, 10, 25)
+# Days either side of a date that are pooled into its percentiles, so each
+# one is drawn from (2 * SEASON_WINDOW + 1) days per year rather than one.
+SEASON_WINDOW = 7
+# Dry days are never anomalous, however dry the season (IMD rainy day).
+WET_DAY = 2.5
+# Days at or above this percentile, or any return amount, are flagged.
+ANOMALY_PERCENTILE = 90
+# A year needs this many recorded days before its maximum counts.
+MIN_YEAR_DAYS = 300
+
+
+# ---------- DAY OF YEAR ----------
+# Slots follow a leap-year calendar, so 1 March is slot 60 in every year and
+# 29 February (slot 59) only ever holds leap-year data.
+def is_leap(years):
+    return (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+
+
+def day_slots(days):
+    days = np.asarray(days, dtype="datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    ordinal = (days - years.astype("datetime64[D]")).astype(int)
+    leap = is_leap(years.astype(int) + 1970)
+    return ordinal + ((~leap) & (ordinal >= 59))
+
+
+# ---------- BUILD ----------
+# The daily series goes into a years x 366 grid; every slot's percentiles are
+# one nanpercentile over a sliding window of that grid.
+def year_grid(start, values):
+    days = np.datetime64(start, "D") + np.arange(len(values))
+    years = days.astype("datetime64[Y]").astype(int)
+    grid = np.full((years[-1] - years[0] + 1, 366), np.nan)
+    grid[years - years[0], day_slots(days)] = values
+    return grid
+
+
+def seasonal_percentiles(grid, window=SEASON_WINDOW):
+    padded = np.concatenate([grid[:, -window:], grid, grid[:, :window]], axis=1)
+    pooled = np.lib.stride_tricks.sliding_window_view(padded, 2 * window + 1, axis=1)
+    pooled = pooled.transpose(1, 0, 2).reshape(366, -1)
+    return np.nanpercentile(pooled, CLIMATE_PERCENTILES, axis=1)
+
+
+def return_amounts(grid):
+    # Gumbel fit (method of moments) to the annual maximum daily rainfall.
+    complete = np.sum(~np.isnan(grid), axis=1) >= MIN_YEAR_DAYS
+    maxima = np.nanmax(grid[complete], axis=1) if complete.any() else np.empty(0)
+    if len(maxima) < 2:
+        return np.full(len(RETURN_PERIODS), np.nan)
+    scale = np.sqrt(6) * maxima.std(ddof=1) / np.pi
+    location = maxima.mean() - np.euler_gamma * scale
+    periods = np.array(RETURN_PERIODS, dtype=float)
+    return location - scale * np.log(-np.log(1 - 1 / periods))
+
+
+def build_climate(start, values, built=None):
+    values = np.asarray(values, dtype=float)
+    grid = year_grid(start, values)
+    return {
+        "start": np.datetime64(start, "D"),
+        "daily": values.astype(np.float32),
+        "percentiles": seasonal_percentiles(grid).astype(np.float32),
+        "returns": return_amounts(grid).astype(np.float32),
+        "built": np.datetime64(built or date.today(), "D"),
+    }
+
+
+# ---------- LOOKUP ----------
+# One column index per forecast day into the precomputed tables; no history
+# is read. `percentile` is the highest of CLIMATE_PERCENTILES the day reaches
+# (0 if none) and `return_period` likewise for RETURN_PERIODS.
+def flag_days(climate, days, amounts):
+    amounts = np.asarray(amounts, dtype=float)
+    wet = amounts >= WET_DAY
+    table = climate["percentiles"][:, day_slots(list(days))]
+    level = np.sum((amounts >= table) & wet, axis=0)
+    returns = climate["returns"][:, None]
+    period = np.sum((amounts >= returns) & wet, axis=0)
+    percentile = np.array((0,) + CLIMATE_PERCENTILES)[level]
+    return_period = np.array((0,) + RETURN_PERIODS)[period]
+    first, last = climate["start"], climate["start"] + len(climate["daily"]) - 1
+    return pd.DataFrame({
+        "percentile": percentile,
+        "return_period": return_period,
+        "anomalous": (percentile >= ANOMALY_PERCENTILE) | (return_period > 0),
+        "normal_mm": table[CLIMATE_PERCENTILES.index(50)],
+        "years": f"{first.astype(object).year}–{last.astype(object).year}",
+    }, index=pd.Index(days, name="date"))
+
+
+# ---------- STORE ----------
+# Per-site .npz files of plain arrays. get() never waits on the archive: a
+# site not built yet is queued on a background worker and None is returned
+# until it is ready.
+class Climatology:
+    def __init__(self, directory=CLIMATE_DIR, fetch_range=open_meteo.fetch_archive_daily, years=CLIMATE_YEARS):
+        self.directory = directory
+        self.fetch_range = fetch_range
+        self.years = years
+        self.lock = threading.Lock()
+        self.sites = {}
+        self.pending = {}
+        self.failures = 0
+        self.last_error = None
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rain-climate")
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, lat, lon):
+        return os.path.join(self.directory, f"{float(lat)}_{float(lon)}.npz")
+
+    def current(self, climate, today):
+        return climate is not None and (today - climate["built"].astype(object)).days < REBUILD_AFTER
+
+    def read(self, lat, lon):
+        try:
+            # [()] turns the 0-d arrays np.savez stores for `start` and
+            # `built` back into datetime64 scalars; other arrays pass through.
+            with np.load(self.path(lat, lon)) as f:
+                return {key: f[key][()] for key in f.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write(self, lat, lon, climate):
+        path = self.path(lat, lon)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **climate)
+        os.replace(tmp, path)
+
+    def build(self, lat, lon, today=None):
+        # Whole calendar years up to the end of last year, in one archive call.
+        today = today or date.today()
+        start = date(today.year - self.years, 1, 1)
+        end = date(today.year - 1, 12, 31)
+        rows = self.fetch_range(lat, lon, start.isoformat(), end.isoformat())
+        values = np.full((end - start).days + 1, np.nan)
+        for day, value in rows:
+            offset = (date.fromisoformat(day) - start).days
+            if value is not None and 0 <= offset < len(values):
+                values[offset] = value
+        climate = build_climate(start, values, today)
+        self.write(lat, lon, climate)
+        return climate
+
+    def load(self, lat, lon, today=None):
+        # Blocking: the stored file if current, otherwise a fresh build.
+        today = today or date.today()
+        key = (float(lat), float(lon))
+        with self.lock:
+            climate = self.sites.get(key)
+        if not self.current(climate, today):
+            climate = self.read(lat, lon)
+        if not self.current(climate, today):
+            climate = self.build(lat, lon, today)
+        with self.lock:
+            self.sites[key] = climate
+        return climate
+
+    def background_load(self, key):
+        try:
+            self.load(*key)
+        except Exception as e:
+            with self.lock:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def get(self, lat, lon):
+        key = (float(lat), float(lon))
+        with self.lock:
+            climate = self.sites.get(key)
+        if climate is None:
+            # A built file is a few KB; reading it is cheaper than a rerun.
+            climate = self.read(lat, lon)
+            if climate is not None:
+                with self.lock:
+                    climate = self.sites.setdefault(key, climate)
+        if self.current(climate, date.today()):
+            return climate
+        with self.lock:
+            if key not in self.pending:
+                self.pending[key] = self.executor.submit(self.background_load, key)
+        return climate
+
+    def stats(self):
+        with self.lock:
+            return {
+                "sites": len(self.sites),
+                "building": len(self.pending),
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,604 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import open_meteo
+from calendar_html import LEGEND_HTML, PAGE_CSS, calendar_grid_html, climate_label, climate_title, hourly_grid_html
+from climatology import Climatology, flag_days
+from forecast_cache import SERVE_WAIT, ForecastCache, ModelClock, grid_resolution, update_interval
+from forecast_store import open_store
+from instrumentation import (
+    ENABLED as METRICS_ENABLED, RerunTimings, count, lazy_import, metrics, preload, record_startup,
+    start_metrics_server,
+)
+from prefetch import Prefetcher
+from rain_alerts import AlertBook, alert_events
+from rain_history import RainHistory
+from rain_stats import build_ensemble, day_slice, overview_frame
+from rainfall_engine import (
+    DEFAULT_PLACES, ENSEMBLE_PARAMS, FORECAST_PARAMS, SITES, aggregate, fetch_ensembles, fetch_forecasts,
+)
+
+# The Streamlit dashboard shared by master.py, rainfall_2.py and
+# rainfall_dashboard.py. Fetching and aggregation come from rainfall_engine;
+# this module holds the per-process caches and the page itself. Each script
+# only chooses which sections it shows:
+#
+#   dashboard.run(SCRIPT_START, ensemble=True, past_rainfall=True)
+
+# ---------- USER GUIDE ----------
+USER_GUIDE = """
+**Welcome to the Rainfall Forecast Calendar!** Here's how you can explore the 14-day rainfall forecast:
+
+1. **📍 Select a City** from the dropdown menu — choose from over 20 locations across India.
+2. **📅 View Calendar**: The forecast is shown in a weekly grid.
+   - Each block shows the **total rainfall** for the day.
+   - Colored bars below each date indicate intensity (legend at bottom).
+3. **🔍 Click Any Day** to view the **hourly rainfall** breakdown with time and intensity.
+4. **⬅️ Go Back**: Use the "Back to Calendar View" button to return to the full calendar.
+5. **🌈 Rainfall Intensity Legend** at the bottom helps interpret rainfall levels.
+
+---
+This app is powered by real-time data from [Open-Meteo](https://open-meteo.com/) and updates every 30 minutes.
+    """
+
+def render_user_guide():
+    with st.expander("ℹ️ How to Use This App", expanded=True):
+        st.markdown(USER_GUIDE)
+
+# ---------- SITE FINDER ----------
+# Nearest facilities to any coordinate, and everything within a radius of it.
+def render_site_finder(registry, lat, lon):
+    with st.expander("📍 Find sites near a location"):
+        col_lat, col_lon, col_radius = st.columns(3)
+        near_lat = col_lat.number_input("Latitude", -90.0, 90.0, float(lat), format="%.4f")
+        near_lon = col_lon.number_input("Longitude", -180.0, 180.0, float(lon), format="%.4f")
+        radius = col_radius.number_input("Radius (km)", 1.0, 5000.0, 100.0, step=10.0)
+        nearest = registry.nearest(near_lat, near_lon, k=1)
+        if nearest:
+            st.caption(f"Nearest site: **{nearest[0][0]}** ({nearest[0][1]:.1f} km)")
+        within = registry.within(near_lat, near_lon, radius)
+        st.dataframe(
+            pd.DataFrame(within, columns=["Site", "Distance (km)"]).round(1),
+            hide_index=True,
+        )
+
+# ---------- CITY SELECT ----------
+# Returns (overview, ensemble_mode, city) for this rerun.
+def select_site(ensemble=False):
+    with st.container():
+        overview = st.toggle("🗺️ All sites overview", key="overview")
+        ensemble_mode = ensemble and st.toggle("🎲 Ensemble (GEFS members)", key="ensemble", disabled=overview)
+        city_names = sorted(DEFAULT_PLACES.keys())
+        requested_city = st.query_params.get("city")
+        city = st.selectbox(
+            "Choose a city:", city_names,
+            index=city_names.index(requested_city) if requested_city in DEFAULT_PLACES else 0,
+            disabled=overview,
+        )
+        st.query_params["city"] = city
+    if not overview:
+        render_site_finder(SITES, *DEFAULT_PLACES[city])
+        st.markdown(f"### 📍 Forecast for: `{city}`")
+    return overview, ensemble_mode, city
+
+# ---------- FETCH WEATHER ----------
+# Payloads are also written to a store shared by every worker and replica
+# (RAINFALL_CACHE_URL), so a restart starts warm and the fleet fetches each
+# forecast once per expiry instead of once per process.
+@st.cache_resource
+def get_payload_store():
+    return open_store()
+
+# Sites in one model grid cell share one cache entry. On a miss one bulk
+# request warms every site in DEFAULT_PLACES, so only the first rerun after
+# expiry pays network latency. Entries live for one model update cycle, or
+# until the model metadata says a newer run is out.
+@st.cache_resource
+def get_forecast_cache():
+    fetch_meta = open_meteo.model_meta_fetcher(
+        open_meteo.FORECAST_URL, FORECAST_PARAMS, open_meteo.FORECAST_META_MODELS
+    )
+    cache = ForecastCache(
+        lambda coords: fetch_forecasts(coords, FORECAST_PARAMS),
+        ttl=update_interval(FORECAST_PARAMS),
+        resolution=grid_resolution(FORECAST_PARAMS),
+        store=get_payload_store(),
+        namespace=f"forecast?{FORECAST_PARAMS}",
+        clock=fetch_meta and ModelClock(fetch_meta),
+    )
+    metrics.register_cache("forecast", cache.stats)
+    return cache
+
+# Refreshes every site shortly before its TTL runs out, off the request path.
+@st.cache_resource
+def get_prefetcher():
+    prefetcher = Prefetcher(get_forecast_cache(), DEFAULT_PLACES.values())
+    prefetcher.start()
+    return prefetcher
+
+# Serves the last good forecast at once and refreshes it in the background;
+# only a site with nothing cached waits, and never longer than SERVE_WAIT.
+def fetch_weather_data(lat, lon):
+    return get_forecast_cache().serve([(lat, lon)], warm=DEFAULT_PLACES.values())[(lat, lon)]
+
+def render_freshness(served, cache):
+    as_of = datetime.fromtimestamp(served["fetched_at"])
+    if not served["stale"]:
+        st.caption(f"🕒 Data as of {as_of:%H:%M}")
+        return
+    error = cache.stats()["last_error"]
+    st.info(
+        f"🕒 Data as of {as_of:%d %b %H:%M}: showing the last good forecast while a fresh one loads."
+        + (f" Upstream error: {error}" if error else "")
+    )
+
+# ---------- FETCH ENSEMBLE ----------
+# Every GEFS member for the selected site only; a response is ~30x the size of
+# the deterministic one, so there is no all-sites warm-up here.
+@st.cache_resource
+def get_ensemble_cache():
+    fetch_meta = open_meteo.model_meta_fetcher(
+        open_meteo.ENSEMBLE_URL, ENSEMBLE_PARAMS, open_meteo.ENSEMBLE_META_MODELS
+    )
+    cache = ForecastCache(
+        lambda coords: fetch_ensembles(coords, ENSEMBLE_PARAMS),
+        ttl=update_interval(ENSEMBLE_PARAMS),
+        resolution=grid_resolution(ENSEMBLE_PARAMS),
+        store=get_payload_store(),
+        namespace=f"ensemble?{ENSEMBLE_PARAMS}",
+        clock=fetch_meta and ModelClock(fetch_meta),
+    )
+    metrics.register_cache("ensemble", cache.stats)
+    return cache
+
+# Members x days statistics are built once per ensemble run and shared.
+@st.cache_resource(max_entries=32)
+def load_ensemble(run, _data):
+    count("load_ensemble.misses")
+    return build_ensemble(_data)
+
+# ---------- FETCH PAST RAINFALL ----------
+HISTORY_WINDOWS = (15, 30, 90, 365)
+
+# Daily history is kept per site on disk and only the days after the last
+# stored one are downloaded, so longer windows are served locally. Archive
+# downloads go through the shared store, so replicas fetch each range once.
+ARCHIVE_TTL = 6 * 3600
+
+def fetch_archive_shared(lat, lon, start_date, end_date):
+    return get_payload_store().cached(
+        f"archive:{lat},{lon}:{start_date}:{end_date}", ARCHIVE_TTL,
+        lambda: open_meteo.fetch_archive_daily(lat, lon, start_date, end_date),
+    )
+
+@st.cache_resource
+def get_rain_history():
+    return RainHistory(fetch_range=fetch_archive_shared)
+
+@st.cache_data(ttl=3600)
+def fetch_past_rainfall(lat, lon, days=15):
+    count("fetch_past_rainfall.misses")
+    history = get_rain_history().window(lat, lon, days)
+    df_hist = pd.DataFrame({
+        "Date": pd.to_datetime([day for day, _ in history]),
+        "Rainfall (mm)": [rain for _, rain in history]
+    })
+    return df_hist
+
+# ---------- CONCURRENT LOADING ----------
+# The archive request starts as soon as the page loads and runs alongside the
+# forecast fetch, so a cold page waits for the slower call, not both in series.
+@st.cache_resource
+def get_loader_pool():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="rain-loader")
+
+# ---------- CLIMATOLOGY ----------
+# Day-of-year percentiles and return amounts per site, built once from years
+# of archive data and kept on disk. Lookups never wait: until a site's file
+# is built its calendar simply has no flags.
+@st.cache_resource
+def get_climatology():
+    return Climatology()
+
+def climate_flags(lat, lon, df_daily):
+    climate = get_climatology().get(lat, lon)
+    if climate is None:
+        return None
+    return flag_days(climate, df_daily.index, df_daily["precipitation"])
+
+# ---------- FORECAST AGGREGATES ----------
+# Daily, weekly and peak-hour figures are built once per forecast run and
+# shared read-only across sessions, so a rerun gets the same compact frames
+# back instead of unpickling a fresh copy. A revalidated but unchanged payload
+# keeps its run, so nothing is rebuilt.
+@st.cache_resource(max_entries=64)
+def load_forecast(run, _data):
+    count("load_forecast.misses")
+    return aggregate(_data)
+
+# One HTML element per expanded day, reused for the same site and forecast run.
+@st.cache_data(max_entries=256)
+def render_hourly_panel(site, run, day, _forecast):
+    return hourly_grid_html(day_slice(_forecast, day))
+
+# ---------- CALENDAR ----------
+# "html" sends the whole calendar as one cached element with a single day
+# picker under it; "buttons" keeps one st.button per day. Either way a click
+# reruns only the forecast view fragment.
+CALENDAR_MODE = os.environ.get("RAINFALL_CALENDAR_MODE", "html")
+
+@st.cache_data(max_entries=256)
+def render_calendar(site, run, city, ensemble_run, has_climate, _forecast, _ensemble, _climate):
+    return calendar_grid_html(_forecast["daily"], city, _ensemble, _climate, links=False)
+
+def open_day(key):
+    # The picker is cleared as it opens a day, so going back shows it empty.
+    day = st.session_state.pop(key)
+    st.session_state.expanded_day = day
+    st.query_params["day"] = day.isoformat()
+
+def render_day_picker(site, df_daily):
+    key = f"open_day_{site}"
+    st.radio(
+        "🔍 Open a day:", df_daily.index, index=None, horizontal=True,
+        format_func=lambda day: f"{day.strftime('%d')} {day.strftime('%b')}",
+        key=key, on_change=open_day, args=(key,),
+    )
+
+def render_calendar_buttons(df_daily, ensemble=None, climate=None):
+    for _, week in df_daily.groupby("week"):
+        cols = st.columns(7)
+        for i, (day, total_rain, color) in enumerate(
+            zip(week.index, week["precipitation"], week["color"])
+        ):
+            with cols[i]:
+                label_date = f"{day.strftime('%d')} {day.strftime('%b')}, {day.year}"
+                label_rain = f"🌧️ {total_rain:.1f} mm"
+                btn_label = f"{label_date}\n{label_rain}"
+
+                if st.button(btn_label, key=f"day_{day}"):
+                    st.session_state.expanded_day = day
+                    st.query_params["day"] = day.isoformat()
+                    st.rerun(scope="fragment")
+
+                st.markdown(
+                    f"<div class='rain-bar' style='background-color:{color};'></div>",
+                    unsafe_allow_html=True
+                )
+                if ensemble and day in ensemble["daily"].index:
+                    spread = ensemble["daily"].loc[day]
+                    st.caption(
+                        f"🎲 {ensemble['exceedance'].at[day, 'Light']:.0%} · "
+                        f"{spread['p10']:.0f}–{spread['p90']:.0f} mm"
+                    )
+                if climate is not None and climate.at[day, "anomalous"]:
+                    flag = next(climate.loc[[day]].itertuples())
+                    st.caption(climate_label(flag), help=climate_title(flag))
+
+# ---------- FORECAST VIEW ----------
+# Calendar and hourly panel as one fragment: opening a day or going back
+# reruns only this section, not the sidebar, legend or past rainfall.
+@st.fragment
+def render_forecast_view(site, city, forecast, ensemble=None, climate=None):
+    if st.session_state.expanded_day:
+        day = st.session_state.expanded_day
+        st.markdown(f"## 🗓️ {day.strftime('%d').lstrip('0')} {day.strftime('%B')} {day.year} - Hourly Rainfall")
+
+        st.markdown(render_hourly_panel(site, forecast["run"], day, forecast), unsafe_allow_html=True)
+        st.markdown("---")
+        if st.button("⬅️ Back to Calendar View"):
+            st.session_state.expanded_day = None
+            st.query_params.pop("day", None)
+            st.rerun(scope="fragment")
+
+    else:
+        st.markdown("### 🗓️ Calendar View")
+        if CALENDAR_MODE == "html":
+            st.markdown(
+                render_calendar(
+                    site, forecast["run"], city,
+                    ensemble and ensemble["run"], climate is not None, forecast, ensemble, climate,
+                ),
+                unsafe_allow_html=True,
+            )
+            render_day_picker(site, forecast["daily"])
+        else:
+            render_calendar_buttons(forecast["daily"], ensemble, climate)
+
+# ---------- PAST RAINFALL ----------
+# Its own fragment, and off until switched on: a page that never shows it
+# never fetches or sends it, and changing the window reruns only this section.
+# `prefetched` is (days, future) when main() already started the fetch.
+@st.fragment
+def render_past_rainfall(lat, lon, prefetched=None):
+    st.markdown("---")
+    if not st.toggle("⏳ Show past rainfall", key="show_past"):
+        return
+    history_days = st.select_slider(
+        "History window (days):", options=HISTORY_WINDOWS, value=HISTORY_WINDOWS[0], key="history_days"
+    )
+    st.markdown(f"## ⏳ Past {history_days} Days Rainfall")
+
+    count("fetch_past_rainfall.calls")
+    if prefetched is not None and prefetched[0] == history_days:
+        future = prefetched[1]
+    else:
+        future = get_loader_pool().submit(fetch_past_rainfall, lat, lon, history_days)
+    try:
+        df_past = future.result(timeout=SERVE_WAIT)
+    except Exception:
+        df_past = pd.DataFrame()
+
+    if df_past.empty:
+        st.warning(f"⚠️ Could not retrieve past {history_days} days rainfall data.")
+        return
+    # The archive lags by a few days; those days come back empty.
+    recorded = df_past.dropna(subset=["Rainfall (mm)"])
+    if recorded.empty:
+        st.info(f"ℹ️ The archive has no rainfall recorded yet for the past {history_days} days.")
+        return
+    total_past = recorded["Rainfall (mm)"].sum()
+    max_day = recorded.loc[recorded["Rainfall (mm)"].idxmax()]
+    min_day = recorded.loc[recorded["Rainfall (mm)"].idxmin()]
+
+    st.markdown(f"**📊 Total Rainfall** in Past {history_days} Days: `{total_past:.1f} mm`")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.success(f"🌧️ Wettest: {max_day['Date'].date()} — {max_day['Rainfall (mm)']:.1f} mm")
+    with col2:
+        st.info(f"🌤️ Driest: {min_day['Date'].date()} — {min_day['Rainfall (mm)']:.1f} mm")
+
+    st.altair_chart(
+        lazy_import("charts").past_rainfall_chart(df_past, history_days), use_container_width=True
+    )
+
+# ---------- ALL SITES OVERVIEW ----------
+# One batched fetch and one vectorised site x day aggregation, rebuilt only
+# when the forecast cache has received a changed forecast.
+@st.cache_data(ttl=1800, max_entries=8)
+def load_overview(names, generation, _payloads):
+    return overview_frame(names, _payloads)
+
+def served_sites(wait=SERVE_WAIT, counted=True):
+    # (names, payloads) for every site with a forecast to show.
+    served = get_forecast_cache().serve(
+        (DEFAULT_PLACES[name] for name in sorted(DEFAULT_PLACES)), wait=wait, counted=counted
+    )
+    names = tuple(name for name in sorted(DEFAULT_PLACES) if served[DEFAULT_PLACES[name]])
+    return names, [served[DEFAULT_PLACES[name]]["payload"] for name in names]
+
+def render_overview():
+    cache = get_forecast_cache()
+    names, payloads = served_sites()
+    if not names:
+        st.error(f"⚠️ Forecast service unavailable: {cache.stats()['last_error'] or 'timed out'}")
+        return
+    frame = load_overview(names, cache.generation, payloads)
+    st.markdown("### 🗺️ All Sites Overview")
+    if len(names) < len(DEFAULT_PLACES):
+        st.caption(f"{len(DEFAULT_PLACES) - len(names)} sites still loading.")
+    alerts = load_alerts(names, cache.generation, payloads)
+    if not alerts.empty:
+        st.markdown(f"### ⚠️ Rain Alerts ({(alerts['status'] == 'new').sum()} new)")
+        st.dataframe(format_alerts(alerts), hide_index=True)
+    st.altair_chart(lazy_import("charts").overview_heatmap(frame), use_container_width=True)
+
+# ---------- RAIN ALERTS ----------
+# Rolling 24 h / 72 h accumulations over every site's hourly forecast,
+# checked against the IMD thresholds once per changed forecast. The book
+# keeps alert ids stable across forecast updates.
+@st.cache_resource
+def get_alert_book():
+    return AlertBook()
+
+@st.cache_resource(max_entries=4)
+def load_alerts(names, generation, _payloads):
+    return get_alert_book().update(alert_events(names, _payloads), names)
+
+def format_alerts(alerts):
+    return pd.DataFrame({
+        "Site": alerts["site"],
+        "Alert": alerts["rule"],
+        "From": alerts["onset"].dt.strftime("%d %b %H:%M"),
+        "Until": alerts["until"].dt.strftime("%d %b %H:%M"),
+        "Peak (mm)": alerts["peak_mm"],
+        "Status": alerts["status"],
+    })
+
+def render_site_alerts(city):
+    # Never waits: alerts cover whichever sites are already cached. Not
+    # counted, since this view's lookup was the selected site's.
+    names, payloads = served_sites(wait=0, counted=False)
+    if not names:
+        return
+    alerts = load_alerts(names, get_forecast_cache().generation, payloads)
+    for alert in alerts[alerts["site"] == city].itertuples():
+        st.warning(
+            f"⚠️ {alert.rule}: {alert.onset:%d %b %H:%M} – {alert.until:%d %b %H:%M}, "
+            f"peak {alert.peak_mm:.1f} mm"
+        )
+
+# ---------- INSTRUMENTATION ----------
+# Timers are on with RAINFALL_METRICS=1 or ?debug=1; otherwise every lap is a no-op.
+@st.cache_resource
+def get_metrics_server():
+    return start_metrics_server()
+
+def render_debug_panel(timings):
+    with st.sidebar.expander("⏱️ Timing (this rerun)", expanded=True):
+        st.dataframe(
+            pd.DataFrame(
+                [(stage, seconds * 1000) for stage, seconds in timings.laps],
+                columns=["Stage", "ms"],
+            ),
+            hide_index=True,
+        )
+        st.caption(f"Total: {timings.total() * 1000:.1f} ms")
+        for name, stats in metrics.cache_stats().items():
+            st.caption(f"{name}: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_ratio']:.0%})")
+        startup = metrics.startup_report()
+        if startup:
+            st.caption("Startup: " + " · ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in startup.items()))
+
+# ---------- STARTUP ----------
+# Charting is imported lazily; once the first page is out it is loaded in the
+# background so the first chart is not slowed down by it either.
+@st.cache_resource
+def preload_charts():
+    preload("charts")
+
+# ---------- MAIN ----------
+def main(city, overview=False, ensemble_mode=False, past_rainfall=False, summary="Rain Forecast Summary"):
+    lat, lon = DEFAULT_PLACES[city]
+    debug = st.query_params.get("debug") == "1"
+    timings = RerunTimings(enabled=METRICS_ENABLED or debug)
+    get_metrics_server()
+    get_prefetcher()
+    if overview:
+        render_overview()
+        timings.lap("render_overview")
+        timings.finish("overview")
+        if debug:
+            render_debug_panel(timings)
+        return
+    # Past rainfall is only fetched while its section is switched on; it then
+    # starts alongside the forecast.
+    past = None
+    if past_rainfall and st.session_state.get("show_past"):
+        history_days = st.session_state.get("history_days", HISTORY_WINDOWS[0])
+        past = (history_days, get_loader_pool().submit(fetch_past_rainfall, lat, lon, history_days))
+    if ensemble_mode:
+        ensemble_future = get_loader_pool().submit(get_ensemble_cache().serve, [(lat, lon)])
+    served = fetch_weather_data(lat, lon)
+    timings.lap("fetch_forecast")
+    if served is None:
+        error = get_forecast_cache().stats()["last_error"]
+        st.warning(
+            "⚠️ The forecast service is not responding and nothing is cached for this site yet. "
+            "It is retried in the background; reload in a moment."
+            + (f" ({error})" if error else "")
+        )
+        timings.finish("unavailable")
+        if debug:
+            render_debug_panel(timings)
+        return
+    render_freshness(served, get_forecast_cache())
+    render_site_alerts(city)
+    timings.lap("alerts")
+    count("load_forecast.calls")
+    forecast = load_forecast(served["run"], served["payload"])
+    timings.lap("parse_aggregate")
+    df_daily = forecast["daily"]
+    climate = climate_flags(lat, lon, df_daily)
+    timings.lap("climatology")
+
+    ensemble = None
+    if ensemble_mode:
+        try:
+            served_ensemble = ensemble_future.result()[(lat, lon)]
+            if served_ensemble is None:
+                raise TimeoutError(get_ensemble_cache().stats()["last_error"] or "timed out")
+            count("load_ensemble.calls")
+            ensemble = load_ensemble(served_ensemble["run"], served_ensemble["payload"])
+        except Exception as e:
+            st.warning(f"⚠️ Ensemble forecast unavailable: {e}")
+        timings.lap("ensemble")
+
+    # The open day lives in the query string in both calendar modes, so a full
+    # rerun, a reload or a shared link all land on the same view.
+    requested_day = st.query_params.get("day")
+    st.session_state.expanded_day = next(
+        (day for day in df_daily.index if day.isoformat() == requested_day), None
+    )
+
+    with st.sidebar:
+        st.markdown(f"## 📊 {summary}")
+        total_rain_all = forecast["total"]
+        st.metric("Total Rain (14 Days)", f"{total_rain_all:.1f} mm")
+
+        for i, rain in forecast["weekly"].items():
+            st.metric(f"Week {i} Total", f"{rain:.1f} mm")
+
+        st.markdown("---")
+        avg_daily = df_daily["precipitation"].mean()
+        wettest_date = df_daily["precipitation"].idxmax()
+        driest_date = df_daily["precipitation"].idxmin()
+
+        st.write("**Daily Avg Rainfall**")
+        st.code(f"{avg_daily:.1f} mm/day")
+
+        st.write("**Wettest Day**")
+        st.code(f"{wettest_date}: {df_daily.at[wettest_date, 'precipitation']:.1f} mm")
+
+        st.write("**Driest Day**")
+        st.code(f"{driest_date}: {df_daily.at[driest_date, 'precipitation']:.1f} mm")
+
+        if ensemble:
+            st.markdown("---")
+            st.metric("Ensemble Mean (14 Days)", f"{ensemble['daily']['mean'].sum():.1f} mm")
+            st.caption(
+                f"{ensemble['members']} members · 🎲 chance of 2.5 mm or more · "
+                f"range is the 10th–90th percentile"
+            )
+
+        stats = get_forecast_cache().stats()
+        st.caption(
+            f"Forecast cache: {stats['hits']} hits / {stats['misses']} misses · "
+            f"{stats['sites']} sites share {stats['cells']} grid cells · "
+            f"{stats['unchanged']} refetches unchanged · "
+            f"forecast in memory: {forecast['memory'] / 1024:.0f} KiB"
+        )
+        if climate is None:
+            st.caption("📈 Climatology for this site is still being built.")
+        else:
+            st.caption(
+                f"📈 {climate['anomalous'].sum()} days unusually wet for the time of year "
+                f"(vs {climate['years'].iat[0]})"
+            )
+        prefetch = get_prefetcher().status()
+        if prefetch["last_run"]:
+            st.caption(
+                f"Prefetch: last run {datetime.fromtimestamp(prefetch['last_run']):%H:%M:%S} · "
+                f"{prefetch['queue_depth']} queued · {prefetch['failures']} failures"
+            )
+
+    timings.lap("render_sidebar")
+
+    render_forecast_view((lat, lon), city, forecast, ensemble, climate)
+
+    timings.lap("render_calendar")
+
+    # ---------- LEGEND SCALE ----------
+    st.markdown("### 🌈 Rainfall Intensity Legend")
+    st.markdown(LEGEND_HTML, unsafe_allow_html=True)
+    timings.lap("render_legend")
+
+    # ---------- PAST RAINFALL SECTION ----------
+    if past_rainfall:
+        render_past_rainfall(lat, lon, past)
+        timings.lap("render_past")
+
+    timings.finish(city)
+    if debug:
+        render_debug_panel(timings)
+
+# ---------- PAGE ----------
+# One full script run. `started` is the script's first perf_counter(), for
+# the startup report; the flags choose the optional sections.
+def run(started, ensemble=False, past_rainfall=False, guide_first=False, summary="Rain Forecast Summary"):
+    st.set_page_config(page_title="Rain Calendar", layout="wide")
+    st.title("🌧️ 14-Day Rainfall Forecast Calendar")
+    # Styles go out with the title, before any fetch, so the first paint is styled.
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+    if guide_first:
+        render_user_guide()
+    overview, ensemble_mode, city = select_site(ensemble)
+    main(city, overview, ensemble_mode, past_rainfall, summary)
+    record_startup("first_render", started)
+    preload_charts()
+    if not guide_first:
+        render_user_guide()
@@ -0,0 +1,347 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for
+from urllib.parse import parse_qs
+
+from rain_stats import forecast_run
+
+# ---------- GRID RESOLUTION ----------
+# Open-Meteo answers every coordinate with the nearest model grid cell, so two
+# sites inside the same cell get the same forecast. Snapping the cache key to
+# the cell lets aliases ("Kakinada 1"/"Kakinada 2") share one entry and one
+# fetch. Upstream is still asked for a real site coordinate, never the cell
+# centre. Without models= (or with a model not listed here) Open-Meteo blends
+# models of differing resolution, so only identical coordinates are shared.
+GRID_RESOLUTION = {
+    "gfs_seamless": 0.25,
+    "gfs025": 0.25,
+    "ecmwf_ifs025": 0.25,
+    "icon_global": 0.125,
+}
+DEFAULT_GRID_RESOLUTION = None
+
+
+def grid_resolution(params):
+    models = parse_qs(params).get("models", [""])[0].split(",")
+    if not all(m in GRID_RESOLUTION for m in models):
+        return DEFAULT_GRID_RESOLUTION
+    return min(GRID_RESOLUTION[m] for m in models)
+
+
+def snap(lat, lon, resolution):
+    if resolution is None:
+        return float(lat), float(lon)
+    return (
+        round(round(lat / resolution) * resolution, 6),
+        round(round(lon / resolution) * resolution, 6),
+    )
+
+
+# ---------- UPDATE CADENCE ----------
+# How often each model publishes a new run. An entry is never trusted for
+# longer than one cycle; with a ModelClock it is rechecked as soon as a newer
+# run has been published. best_match blends models, some of them hourly.
+MODEL_UPDATE_INTERVAL = {
+    "gfs_seamless": 21600,
+    "gfs025": 21600,
+    "gfs05": 21600,
+    "ecmwf_ifs025": 21600,
+    "icon_global": 21600,
+}
+DEFAULT_UPDATE_INTERVAL = 3600
+
+
+def update_interval(params):
+    models = parse_qs(params).get("models", [""])[0].split(",")
+    return min((MODEL_UPDATE_INTERVAL.get(m, DEFAULT_UPDATE_INTERVAL) for m in models), default=DEFAULT_UPDATE_INTERVAL)
+
+
+# ---------- MODEL RUNS ----------
+# Tracks when the upstream model last published a run, from Open-Meteo's model
+# metadata. Between checks later runs are projected on the model's update
+# interval, so an overdue check costs at most one revalidation.
+class ModelClock:
+    def __init__(self, fetch_meta, check_every=600):
+        self.fetch_meta = fetch_meta
+        self.check_every = check_every
+        self.lock = threading.Lock()
+        self.initialised_at = None
+        self.available_at = None
+        self.interval = None
+        self.checked_at = 0.0
+        self.last_error = None
+
+    def check(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            if now - self.checked_at < self.check_every:
+                return
+            self.checked_at = now
+        try:
+            meta = self.fetch_meta()
+        except Exception as e:
+            with self.lock:
+                self.last_error = str(e)
+            return
+        with self.lock:
+            self.initialised_at = meta["last_run_initialisation_time"]
+            self.available_at = meta["last_run_availability_time"]
+            self.interval = meta["update_interval_seconds"]
+            self.last_error = None
+
+    def last_published(self, now):
+        # Latest run that should be available at `now`, or None if unknown.
+        with self.lock:
+            if self.available_at is None or not self.interval:
+                return None
+            return self.available_at + (now - self.available_at) // self.interval * self.interval
+
+    def status(self):
+        with self.lock:
+            return {
+                "initialised_at": self.initialised_at,
+                "available_at": self.available_at,
+                "interval": self.interval,
+                "last_error": self.last_error,
+            }
+
+
+# ---------- SERVING ----------
+# serve() never waits on the network for a site that has anything cached. A
+# site with nothing cached waits at most SERVE_WAIT seconds; after a failed
+# refresh upstream is left alone for RETRY_AFTER seconds. Expired entries are
+# kept for MAX_STALE seconds so they can still be served while upstream is down.
+SERVE_WAIT = float(os.environ.get("RAINFALL_SERVE_WAIT", "4"))
+RETRY_AFTER = float(os.environ.get("RAINFALL_RETRY_AFTER", "60"))
+MAX_STALE = float(os.environ.get("RAINFALL_MAX_STALE", str(3 * 86400)))
+
+# With a shared store, a background refresh first claims its cells there for
+# CLAIM_SECONDS; other workers and replicas skip claimed cells and pick the
+# result up from the store instead of calling upstream themselves.
+CLAIM_SECONDS = 60
+
+
+# ---------- CACHE ----------
+# Entries are (fetched_at, payload, run), where run is the content hash of the
+# hourly series and fetched_at the last time upstream confirmed it.
+class ForecastCache:
+    def __init__(self, fetch_many, ttl=DEFAULT_UPDATE_INTERVAL, resolution=DEFAULT_GRID_RESOLUTION,
+                 store=None, namespace="forecast", max_entries=512, clock=None,
+                 retry_after=RETRY_AFTER, max_stale=MAX_STALE):
+        self.fetch_many = fetch_many
+        self.ttl = ttl
+        self.clock = clock
+        self.retry_after = retry_after
+        self.max_stale = max(max_stale, ttl)
+        self.resolution = resolution
+        self.store = store
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.sites = set()
+        # The first site seen in each cell; its coordinates are what upstream is asked for.
+        self.origins = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.unchanged = 0
+        self.generation = 0
+        self.shared = 0
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = 0.0
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="forecast-refresh")
+        self.lock = threading.Lock()
+        if store is not None:
+            self.load()
+
+    def load(self):
+        # Warm start from disk before any network request is made. Expired
+        # entries come along too, as a fallback while upstream is unreachable.
+        prefix = f"{self.namespace}:"
+        for key, fetched_at, payload in self.store.load(prefix, self.max_stale):
+            lat, lon = key[len(prefix):].split(",")
+            self.remember((float(lat), float(lon)), fetched_at, payload, forecast_run(payload))
+
+    def remember(self, cell, fetched_at, payload, run):
+        self.entries[cell] = (fetched_at, payload, run)
+        self.entries.move_to_end(cell)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def store_key(self, cell):
+        return f"{self.namespace}:{cell[0]},{cell[1]}"
+
+    def cell(self, lat, lon):
+        cell = snap(lat, lon, self.resolution)
+        self.origins.setdefault(cell, (float(lat), float(lon)))
+        return cell
+
+    def current(self, fetched_at, now):
+        if now - fetched_at >= self.ttl:
+            return False
+        published = self.clock.last_published(now) if self.clock is not None else None
+        return published is None or fetched_at >= published
+
+    def fresh(self, cell, now):
+        entry = self.entries.get(cell)
+        return entry is not None and self.current(entry[0], now)
+
+    def revalidate(self, cell, fetched_at, payload, run):
+        # An unchanged run keeps the payload already in memory, so everything
+        # built from it stays valid; only its fetch time moves forward.
+        # In memory only, under the lock; returns whether the run changed.
+        entry = self.entries.get(cell)
+        if entry is not None and entry[2] == run:
+            self.remember(cell, fetched_at, entry[1], run)
+            return False
+        self.generation += 1
+        self.remember(cell, fetched_at, payload, run)
+        return True
+
+    def adopt_shared(self, cells, now):
+        # Another worker or replica may already have fetched some of `cells`
+        # into the shared store; take its copy. Returns the cells still to fetch.
+        # The store is read outside the lock, which is only taken to swap entries.
+        if self.store is None:
+            return set(cells)
+        adopted = {}
+        for c in cells:
+            entry = self.store.get(self.store_key(c))
+            if entry is not None and self.current(entry[0], now):
+                adopted[c] = (entry[0], entry[1], forecast_run(entry[1]))
+        with self.lock:
+            for c, (fetched_at, payload, run) in adopted.items():
+                self.shared += 1
+                self.revalidate(c, fetched_at, payload, run)
+        return set(cells) - set(adopted)
+
+    def serve(self, sites, warm=(), wait=SERVE_WAIT, counted=True):
+        # Stale-while-revalidate: whatever is cached for `sites` comes back at
+        # once, and expired cells (plus expired `warm` cells) are refreshed in
+        # the background. Returns {site: {"run", "payload", "fetched_at",
+        # "stale"}}, with None for a site that could not be loaded in time.
+        # A counted call is one lookup however many sites it asks for: a miss
+        # if any of them had expired.
+        sites = tuple(sites)
+        warm = tuple(warm)
+        with self.lock:
+            now = time.time()
+            self.sites.update(sites)
+            self.sites.update(warm)
+            cells = {site: self.cell(*site) for site in sites}
+            stale = {c for c in cells.values() if not self.fresh(c, now)}
+            if counted and cells:
+                self.misses += bool(stale)
+                self.hits += not stale
+            if stale:
+                stale.update(c for c in (self.cell(*site) for site in warm) if not self.fresh(c, now))
+                self.refresh_in_background(stale, now)
+            missing = {self.pending[c] for c in cells.values() if c not in self.entries and c in self.pending}
+        if missing:
+            wait_for(missing, timeout=wait)
+        with self.lock:
+            now = time.time()
+            return {site: self.served(c, now) for site, c in cells.items()}
+
+    def served(self, cell, now):
+        entry = self.entries.get(cell)
+        if entry is None:
+            return None
+        self.entries.move_to_end(cell)
+        return {"run": entry[2], "payload": entry[1], "fetched_at": entry[0], "stale": not self.fresh(cell, now)}
+
+    def refresh_in_background(self, cells, now):
+        # One refresh per cell at a time, and none while backing off. Returns
+        # the refresh's future, or None if nothing was started.
+        cells = {c for c in cells if c not in self.pending}
+        if not cells or now < self.retry_at:
+            return None
+        future = self.executor.submit(self.background_refresh, cells)
+        for c in cells:
+            self.pending[c] = future
+        return future
+
+    def prefetch(self, cells):
+        # refresh_in_background() for callers that do not hold the lock.
+        with self.lock:
+            return self.refresh_in_background(cells, time.time())
+
+    def background_refresh(self, cells):
+        try:
+            self.refresh(cells)
+            with self.lock:
+                self.last_error = None
+        except Exception as e:
+            with self.lock:
+                self.failures += 1
+                self.last_error = str(e)
+                self.retry_at = time.time() + self.retry_after
+            raise
+        finally:
+            with self.lock:
+                for c in cells:
+                    self.pending.pop(c, None)
+
+    def expiring(self, within, sites):
+        # Cells for `sites` that are missing or will expire in the next `within` seconds.
+        with self.lock:
+            now = time.time()
+            cells = {self.cell(lat, lon) for lat, lon in sites}
+            return sorted(c for c in cells if not self.fresh(c, now + within))
+
+    def refresh(self, cells):
+        # Fetches outside the lock so lookups keep being served meanwhile.
+        if self.clock is not None:
+            self.clock.check()
+        cells = self.adopt_shared(cells, time.time())
+        if self.store is not None:
+            cells = {c for c in cells if self.store.claim(self.store_key(c), CLAIM_SECONDS)}
+        if not cells:
+            return
+        with self.lock:
+            coords = {c: self.origins.get(c, c) for c in cells}
+        try:
+            payloads = self.fetch_many(sorted(set(coords.values())))
+            fetched_at = time.time()
+            fetched = {c: payloads[coords[c]] for c in cells}
+            runs = {c: forecast_run(payload) for c, payload in fetched.items()}
+            with self.lock:
+                self.fetches += 1
+                changed = {c: self.revalidate(c, fetched_at, fetched[c], runs[c]) for c in cells}
+                self.unchanged += sum(not v for v in changed.values())
+            # Store writes happen after the swap, outside the lock, and before
+            # the claims are released so other workers find them.
+            if self.store is not None:
+                for c in cells:
+                    if changed[c]:
+                        self.store.put(self.store_key(c), fetched_at, fetched[c])
+                    else:
+                        self.store.revalidate(self.store_key(c), fetched_at)
+        finally:
+            # Success or failure, the next refresh of these cells need not wait
+            # for the claims to lapse.
+            if self.store is not None:
+                for c in cells:
+                    self.store.release(self.store_key(c))
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "fetches": self.fetches,
+                "unchanged": self.unchanged,
+                "generation": self.generation,
+                "shared": self.shared,
+                "refreshing": len(self.pending),
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "sites": len(self.sites),
+                "cells": len(self.entries),
+            }
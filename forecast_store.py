@@ -0,0 +1,280 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ---------- CONFIG ----------
+# Keeps fetched payloads on disk so a restart or redeploy starts warm. On Render
+# point RAINFALL_CACHE_PATH at a persistent disk mount.
+DEFAULT_PATH = os.environ.get(
+    "RAINFALL_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "rainfall.sqlite"),
+)
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RAINFALL_CACHE_MAX_ENTRIES", "512"))
+
+# Picks the backend shared by every worker and replica:
+#   (unset)                  SQLite at RAINFALL_CACHE_PATH
+#   sqlite:////mnt/cache.db  SQLite at that path, e.g. on a shared volume
+#   redis://host:6379/0      any Redis-compatible server (needs `redis`)
+#   memory://                in-process stand-in for Redis, for local runs
+CACHE_URL = os.environ.get("RAINFALL_CACHE_URL", "")
+
+
+# ---------- STORES ----------
+# Every backend offers get / put / revalidate / load / claim / release, and
+# cached() on top of them.
+class Store:
+    def cached(self, key, ttl, fetch):
+        entry = self.get(key)
+        if entry is not None and time.time() - entry[0] < ttl:
+            return entry[1]
+        payload = fetch()
+        self.put(key, time.time(), payload)
+        return payload
+
+
+class PayloadStore(Store):
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # A bare filename lives in the working directory, which already exists.
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS payloads ("
+            " key TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS payloads_accessed ON payloads (accessed_at)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS claims ("
+            " key TEXT PRIMARY KEY,"
+            " until REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fetched_at, payload FROM payloads WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE payloads SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        return row[0], json.loads(row[1])
+
+    def put(self, key, fetched_at, payload):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO payloads (key, fetched_at, accessed_at, payload) VALUES (?, ?, ?, ?)",
+                (key, fetched_at, time.time(), json.dumps(payload, separators=(",", ":"))),
+            )
+            self.evict()
+            self.conn.commit()
+
+    def revalidate(self, key, fetched_at):
+        # Upstream confirmed the stored payload; keep it and move its fetch time.
+        with self.lock:
+            self.conn.execute(
+                "UPDATE payloads SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (fetched_at, time.time(), key),
+            )
+            self.conn.commit()
+
+    def evict(self):
+        # Least recently used entries go first once the store is over its bound.
+        self.conn.execute(
+            "DELETE FROM payloads WHERE key IN ("
+            " SELECT key FROM payloads ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def load(self, prefix, ttl):
+        # Everything still inside its TTL, most recently used last.
+        cutoff = time.time() - ttl
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, fetched_at, payload FROM payloads"
+                " WHERE key LIKE ? ESCAPE '\\' AND fetched_at > ? ORDER BY accessed_at",
+                (prefix.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_") + "%", cutoff),
+            ).fetchall()
+        return [(key, fetched_at, json.loads(payload)) for key, fetched_at, payload in rows]
+
+    def claim(self, key, seconds):
+        # True for the first caller until `seconds` pass, so only one worker
+        # refreshes a key while the others pick up its result from the store.
+        now = time.time()
+        with self.lock:
+            self.conn.execute("DELETE FROM claims WHERE key = ? AND until <= ?", (key, now))
+            claimed = self.conn.execute(
+                "INSERT OR IGNORE INTO claims (key, until) VALUES (?, ?)", (key, now + seconds)
+            ).rowcount == 1
+            self.conn.commit()
+        return claimed
+
+    def release(self, key):
+        # Ends a claim early, once its refresh has stored a result or failed.
+        with self.lock:
+            self.conn.execute("DELETE FROM claims WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+
+
+def text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisStore(Store):
+    # One hash per payload plus a sorted set of keys by last access, which
+    # drives both LRU eviction and prefix loads.
+    def __init__(self, client, max_entries=DEFAULT_MAX_ENTRIES, prefix="rainfall:"):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index = f"{prefix}index"
+
+    def payload_key(self, key):
+        return f"{self.prefix}payload:{key}"
+
+    def get(self, key):
+        fetched_at, payload = self.client.hmget(self.payload_key(key), ["fetched_at", "payload"])
+        if payload is None:
+            return None
+        self.client.zadd(self.index, {key: time.time()})
+        return float(fetched_at), json.loads(payload)
+
+    def put(self, key, fetched_at, payload):
+        self.client.hset(self.payload_key(key), mapping={
+            "fetched_at": repr(fetched_at),
+            "payload": json.dumps(payload, separators=(",", ":")),
+        })
+        self.client.zadd(self.index, {key: time.time()})
+        self.evict()
+
+    def revalidate(self, key, fetched_at):
+        if self.client.exists(self.payload_key(key)):
+            self.client.hset(self.payload_key(key), mapping={"fetched_at": repr(fetched_at)})
+            self.client.zadd(self.index, {key: time.time()})
+
+    def evict(self):
+        excess = self.client.zcard(self.index) - self.max_entries
+        if excess > 0:
+            keys = [text(k) for k in self.client.zrange(self.index, 0, excess - 1)]
+            self.client.delete(*(self.payload_key(k) for k in keys))
+            self.client.zrem(self.index, *keys)
+
+    def load(self, prefix, ttl):
+        cutoff = time.time() - ttl
+        rows = []
+        for key in (text(k) for k in self.client.zrange(self.index, 0, -1)):
+            if not key.startswith(prefix):
+                continue
+            fetched_at, payload = self.client.hmget(self.payload_key(key), ["fetched_at", "payload"])
+            if payload is not None and float(fetched_at) > cutoff:
+                rows.append((key, float(fetched_at), json.loads(payload)))
+        return rows
+
+    def claim(self, key, seconds):
+        return bool(self.client.set(f"{self.prefix}claim:{key}", "1", nx=True, px=int(seconds * 1000)))
+
+    def release(self, key):
+        self.client.delete(f"{self.prefix}claim:{key}")
+
+    def __len__(self):
+        return self.client.zcard(self.index)
+
+
+# ---------- IN-PROCESS REDIS STAND-IN ----------
+# The handful of Redis commands RedisStore uses, kept in a dict, so the Redis
+# code path runs without a server.
+class MemoryRedis:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hashes = {}
+        self.zsets = {}
+        self.strings = {}
+
+    def hset(self, name, mapping):
+        with self.lock:
+            self.hashes.setdefault(name, {}).update({k: str(v) for k, v in mapping.items()})
+
+    def hmget(self, name, keys):
+        with self.lock:
+            fields = self.hashes.get(name, {})
+            return [fields.get(k) for k in keys]
+
+    def exists(self, *names):
+        with self.lock:
+            return sum(name in self.hashes or name in self.zsets or name in self.strings for name in names)
+
+    def delete(self, *names):
+        with self.lock:
+            return sum(
+                self.hashes.pop(name, None) is not None
+                or self.zsets.pop(name, None) is not None
+                or self.strings.pop(name, None) is not None
+                for name in names
+            )
+
+    def zadd(self, name, mapping, xx=False):
+        with self.lock:
+            zset = self.zsets.setdefault(name, {})
+            added = 0
+            for member, score in mapping.items():
+                if xx and member not in zset:
+                    continue
+                added += member not in zset
+                zset[member] = float(score)
+            return added
+
+    def zcard(self, name):
+        with self.lock:
+            return len(self.zsets.get(name, {}))
+
+    def zrange(self, name, start, end):
+        with self.lock:
+            members = sorted(self.zsets.get(name, {}).items(), key=lambda item: (item[1], item[0]))
+        end = len(members) if end == -1 else end + 1
+        return [member for member, _ in members[start:end]]
+
+    def zrem(self, name, *members):
+        with self.lock:
+            zset = self.zsets.get(name, {})
+            return sum(zset.pop(member, None) is not None for member in members)
+
+    def set(self, name, value, nx=False, px=None):
+        with self.lock:
+            now = time.time()
+            current = self.strings.get(name)
+            if current is not None and current[1] is not None and current[1] <= now:
+                current = None
+            if nx and current is not None:
+                return None
+            self.strings[name] = (value, now + px / 1000 if px else None)
+            return True
+
+
+# ---------- BACKEND SELECTION ----------
+def open_store(url=CACHE_URL, max_entries=DEFAULT_MAX_ENTRIES):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RAINFALL_CACHE_URL points at Redis but the redis package is not installed")
+        return RedisStore(redis.Redis.from_url(url), max_entries)
+    if url == "memory://":
+        return RedisStore(MemoryRedis(), max_entries)
+    if url.startswith("sqlite:///"):
+        return PayloadStore(url[len("sqlite:///"):], max_entries)
+    if url:
+        raise ValueError(f"Unsupported RAINFALL_CACHE_URL: {url}")
+    return PayloadStore(max_entries=max_entries)
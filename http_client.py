@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlparse
+
+# ---------- CONFIG ----------
+CONNECT_TIMEOUT = float(os.environ.get("RAINFALL_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("RAINFALL_HTTP_READ_TIMEOUT", "15"))
+RETRIES = int(os.environ.get("RAINFALL_HTTP_RETRIES", "3"))
+BACKOFF = float(os.environ.get("RAINFALL_HTTP_BACKOFF", "0.5"))
+# The dashboards have always fetched with verify=False; keep that unless told otherwise.
+VERIFY = os.environ.get("RAINFALL_HTTP_VERIFY", "0") == "1"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ---------- SESSION ----------
+# One pooled keep-alive session per process, with bounded retries and
+# exponential backoff on connection errors, 429s and 5xx responses. requests
+# is imported with the first fetch, not at startup: a warm page served from
+# the cache never needs it.
+def build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=RETRIES,
+        backoff_factor=BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = VERIFY
+    return session
+
+
+session = None
+session_lock = threading.Lock()
+
+
+def get_session():
+    global session
+    with session_lock:
+        if session is None:
+            session = build_session()
+        return session
+
+
+# ---------- LATENCY ----------
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.errors = 0
+
+    def observe(self, seconds, failed=False):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.errors += failed
+
+    def snapshot(self):
+        return {
+            "buckets": dict(zip(self.buckets + (float("inf"),), self.counts)),
+            "count": sum(self.counts),
+            "sum": self.total,
+            "errors": self.errors,
+        }
+
+
+histograms = {}
+histograms_lock = threading.Lock()
+
+
+def endpoint_of(url):
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path}"
+
+
+def observe(url, seconds, failed):
+    endpoint = endpoint_of(url)
+    with histograms_lock:
+        histograms.setdefault(endpoint, LatencyHistogram()).observe(seconds, failed)
+
+
+def latency_histograms():
+    with histograms_lock:
+        return {endpoint: h.snapshot() for endpoint, h in histograms.items()}
+
+
+# ---------- REQUEST COALESCING ----------
+# Concurrent callers asking for the same URL wait on the first caller's
+# request instead of sending their own.
+class InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+in_flight = {}
+in_flight_lock = threading.Lock()
+
+
+def fetch_json(url, timeout):
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, timeout=timeout)
+        response.raise_for_status()
+        payload = response.json()
+    except Exception:
+        observe(url, time.perf_counter() - start, True)
+        raise
+    observe(url, time.perf_counter() - start, False)
+    return payload
+
+
+def get_json(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    with in_flight_lock:
+        call = in_flight.get(url)
+        leader = call is None
+        if leader:
+            call = in_flight[url] = InFlight()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    try:
+        call.result = fetch_json(url, timeout)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with in_flight_lock:
+            del in_flight[url]
+        call.done.set()
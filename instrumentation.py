@@ -0,0 +1,201 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+
+# ---------- CONFIG ----------
+# RAINFALL_METRICS=1 turns on stage timers and log lines for every rerun;
+# RAINFALL_METRICS_PORT additionally serves Prometheus text on /metrics.
+# Cache counters are always kept, so ?debug=1 shows hit ratios either way.
+ENABLED = os.environ.get("RAINFALL_METRICS", "0") == "1"
+METRICS_PORT = os.environ.get("RAINFALL_METRICS_PORT")
+
+log = logging.getLogger("rainfall.timing")
+if ENABLED and not log.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+
+# ---------- PROCESS-WIDE METRICS ----------
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.caches = {}
+        self.startup = {}
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            count, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (count + 1, total + seconds)
+
+    def inc(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_startup(self, stage, seconds):
+        # First value wins: only the cold start of the process is kept.
+        with self.lock:
+            if stage in self.startup:
+                return False
+            self.startup[stage] = seconds
+            return True
+
+    def startup_report(self):
+        with self.lock:
+            return dict(self.startup)
+
+    def register_cache(self, name, stats):
+        # `stats` returns a dict with at least "hits" and "misses".
+        with self.lock:
+            self.caches[name] = stats
+
+    def cache_stats(self):
+        with self.lock:
+            sources = dict(self.caches)
+            counters = dict(self.counters)
+        stats = {name: stats() for name, stats in sources.items()}
+        # st.cache_data functions count their calls at the call site and their
+        # misses inside the cached body; hits are the difference.
+        for name in {key.rsplit(".", 1)[0] for key in counters if key.endswith(".calls")}:
+            calls = counters.get(f"{name}.calls", 0)
+            misses = counters.get(f"{name}.misses", 0)
+            stats[name] = {"hits": calls - misses, "misses": misses}
+        for s in stats.values():
+            lookups = s["hits"] + s["misses"]
+            s["hit_ratio"] = s["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def prometheus_text(self):
+        lines = ["# TYPE rainfall_stage_seconds summary"]
+        with self.lock:
+            stages = dict(self.stages)
+        for stage, (n, total) in sorted(stages.items()):
+            lines.append(f'rainfall_stage_seconds_count{{stage="{stage}"}} {n}')
+            lines.append(f'rainfall_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append("# TYPE rainfall_startup_seconds gauge")
+        for stage, seconds in sorted(self.startup_report().items()):
+            lines.append(f'rainfall_startup_seconds{{stage="{stage}"}} {seconds:.6f}')
+        lines.append("# TYPE rainfall_cache_hits_total counter")
+        lines.append("# TYPE rainfall_cache_misses_total counter")
+        for name, s in sorted(self.cache_stats().items()):
+            lines.append(f'rainfall_cache_hits_total{{cache="{name}"}} {s["hits"]}')
+            lines.append(f'rainfall_cache_misses_total{{cache="{name}"}} {s["misses"]}')
+        lines.append("# TYPE rainfall_http_request_seconds histogram")
+        for endpoint, h in sorted(http_client.latency_histograms().items()):
+            cumulative = 0
+            for bound, n in h["buckets"].items():
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(f'rainfall_http_request_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}')
+            lines.append(f'rainfall_http_request_seconds_count{{endpoint="{endpoint}"}} {h["count"]}')
+            lines.append(f'rainfall_http_request_seconds_sum{{endpoint="{endpoint}"}} {h["sum"]:.6f}')
+            lines.append(f'rainfall_http_request_errors_total{{endpoint="{endpoint}"}} {h["errors"]}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def count(name, n=1):
+    # One locked dict update per cached call; cheap enough to leave on.
+    metrics.inc(name, n)
+
+
+# ---------- PER-RERUN TIMINGS ----------
+# lap(stage) charges the time since the previous lap to `stage`. When
+# disabled, laps are a bare method call that does nothing.
+class RerunTimings:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.laps = []
+        self.started = self.last = time.perf_counter() if enabled else 0.0
+
+    def lap(self, stage):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.laps.append((stage, now - self.last))
+        metrics.observe(stage, now - self.last)
+        self.last = now
+
+    def total(self):
+        return self.last - self.started
+
+    def finish(self, label=""):
+        if not self.enabled:
+            return
+        metrics.observe("rerun", self.total())
+        log.info(
+            "rerun %s total=%.1fms %s", label, self.total() * 1000,
+            " ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.laps),
+        )
+
+
+# ---------- STARTUP ----------
+# Cold-start report: how long the first script run spent importing, how long
+# it took to first paint, and what each deferred import cost when it was first
+# needed. Always recorded, since it is a handful of numbers per process; the
+# log line needs RAINFALL_METRICS=1.
+def record_startup(stage, started):
+    seconds = time.perf_counter() - started
+    if metrics.record_startup(stage, seconds):
+        log.info("startup %s=%.1fms", stage, seconds * 1000)
+
+
+imports_started = set()
+imports_lock = threading.Lock()
+
+
+def lazy_import(name):
+    # Heavy modules (charting) are imported where they are first used. Always
+    # goes through import_module, which waits on the module's import lock, so
+    # a caller never gets a module that preload() is still initialising. Only
+    # the first import is timed.
+    with imports_lock:
+        first = name not in imports_started and name not in sys.modules
+        imports_started.add(name)
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    if first:
+        record_startup(f"import {name}", started)
+    return module
+
+
+def preload(name):
+    # Imports `name` on a background thread once the first page is out, so the
+    # first chart does not wait for it either.
+    threading.Thread(target=lazy_import, args=(name,), name=f"rainfall-preload-{name}", daemon=True).start()
+
+
+# ---------- METRICS ENDPOINT ----------
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="rainfall-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,106 @@
+import os
+from urllib.parse import parse_qs
+
+import http_client
+
+# ---------- ENDPOINTS ----------
+# Point these at stub_server.py to work offline against recorded responses.
+FORECAST_URL = os.environ.get("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+ENSEMBLE_URL = os.environ.get("OPEN_METEO_ENSEMBLE_URL", "https://ensemble-api.open-meteo.com/v1/ensemble")
+
+# Open-Meteo takes comma separated coordinate lists and answers with one JSON
+# object per location, in request order. Keep chunks small enough that the
+# query string stays well under URL length limits.
+BULK_CHUNK_SIZE = 10
+
+
+# ---------- COORDINATES ----------
+def unique_coords(coords):
+    seen = {}
+    for lat, lon in coords:
+        seen.setdefault((float(lat), float(lon)), None)
+    return list(seen)
+
+
+def coord_query(coords):
+    lats = ",".join(str(lat) for lat, _ in coords)
+    lons = ",".join(str(lon) for _, lon in coords)
+    return f"latitude={lats}&longitude={lons}"
+
+
+# ---------- BULK FORECAST ----------
+def split_bulk_response(coords, payload):
+    if isinstance(payload, dict):
+        payload = [payload]
+    if len(payload) != len(coords):
+        raise ValueError(f"Expected {len(coords)} locations in response, got {len(payload)}")
+    return dict(zip(coords, payload))
+
+
+def fetch_bulk(url, coords, params, chunk_size=BULK_CHUNK_SIZE):
+    sites = unique_coords(coords)
+    results = {}
+    for i in range(0, len(sites), chunk_size):
+        chunk = sites[i:i + chunk_size]
+        api_url = f"{url}?{coord_query(chunk)}&{params}"
+        results.update(split_bulk_response(chunk, http_client.get_json(api_url)))
+    return results
+
+
+def fetch_forecast_bulk(coords, params, chunk_size=BULK_CHUNK_SIZE):
+    return fetch_bulk(FORECAST_URL, coords, params, chunk_size)
+
+
+# ---------- BULK ENSEMBLE ----------
+# One response carries every member, so it is much larger than a forecast;
+# keep the chunks smaller.
+ENSEMBLE_CHUNK_SIZE = 4
+
+
+def fetch_ensemble_bulk(coords, params, chunk_size=ENSEMBLE_CHUNK_SIZE):
+    return fetch_bulk(ENSEMBLE_URL, coords, params, chunk_size)
+
+
+# ---------- ARCHIVE ----------
+def fetch_archive_daily(lat, lon, start_date, end_date):
+    url = (
+        f"{ARCHIVE_URL}?latitude={lat}&longitude={lon}"
+        f"&start_date={start_date}&end_date={end_date}"
+        f"&daily=precipitation_sum&timezone=auto"
+    )
+    daily = http_client.get_json(url)["daily"]
+    return list(zip(daily["time"], daily["precipitation_sum"]))
+
+
+# ---------- MODEL METADATA ----------
+# Each API host publishes when a model's latest run was initialised and became
+# available at /data/<model>/static/meta.json. The names differ from the
+# models= values, and per host.
+FORECAST_META_MODELS = {
+    "gfs_seamless": "ncep_gfs025",
+    "gfs025": "ncep_gfs025",
+    "ecmwf_ifs025": "ecmwf_ifs025",
+    "icon_global": "dwd_icon",
+}
+ENSEMBLE_META_MODELS = {
+    "gfs_seamless": "ncep_gefs025",
+    "gfs025": "ncep_gefs025",
+    "gfs05": "ncep_gefs05",
+    "ecmwf_ifs025": "ecmwf_ifs025_ensemble",
+    "icon_global": "dwd_icon_eps",
+}
+
+
+def fetch_model_meta(api_url, model):
+    host = api_url.split("/v1/", 1)[0]
+    return http_client.get_json(f"{host}/data/{model}/static/meta.json")
+
+
+def model_meta_fetcher(api_url, params, meta_models):
+    # Only a single named model has one run schedule; best_match and model
+    # blends return None and fall back to a fixed TTL.
+    models = parse_qs(params).get("models", [""])[0].split(",")
+    if len(models) != 1 or models[0] not in meta_models:
+        return None
+    return lambda: fetch_model_meta(api_url, meta_models[models[0]])
@@ -0,0 +1,71 @@
+import random
+import threading
+import time
+
+# ---------- BACKGROUND PREFETCH ----------
+# Re-fetches every site shortly before its cache entry expires, so user reruns
+# hit a warm cache. Refreshes go out in small bulk batches spaced by `stagger`
+# seconds plus random jitter, never as one burst. Batches go through the
+# cache's own background refresh, so cells already being fetched are skipped
+# and nothing is sent while the cache is backing off after a failure.
+class Prefetcher(threading.Thread):
+    def __init__(self, cache, sites, lead=300, interval=60, batch_size=5, stagger=2.0, jitter=1.0):
+        super().__init__(name="forecast-prefetch", daemon=True)
+        self.cache = cache
+        self.sites = tuple(sites)
+        self.lead = lead
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stagger = stagger
+        self.jitter = jitter
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.last_run = None
+        self.queue_depth = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.last_error = None
+
+    def run(self):
+        self.stop_event.wait(random.uniform(0, self.jitter))
+        while not self.stop_event.is_set():
+            self.run_once()
+            self.stop_event.wait(self.interval + random.uniform(0, self.jitter))
+
+    def run_once(self):
+        cells = self.cache.expiring(self.lead, self.sites)
+        batches = [cells[i:i + self.batch_size] for i in range(0, len(cells), self.batch_size)]
+        with self.lock:
+            self.queue_depth = len(cells)
+        for i, batch in enumerate(batches):
+            if self.stop_event.is_set():
+                break
+            if i:
+                self.stop_event.wait(self.stagger + random.uniform(0, self.jitter))
+            future = self.cache.prefetch(batch)
+            try:
+                if future is not None:
+                    future.result()
+                    with self.lock:
+                        self.refreshed += len(batch)
+            except Exception as e:
+                with self.lock:
+                    self.failures += 1
+                    self.last_error = str(e)
+            with self.lock:
+                self.queue_depth -= len(batch)
+        with self.lock:
+            self.last_run = time.time()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def status(self):
+        with self.lock:
+            return {
+                "last_run": self.last_run,
+                "queue_depth": self.queue_depth,
+                "refreshed": self.refreshed,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
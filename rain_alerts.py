@@ -0,0 +1,146 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from rain_stats import RAIN_CLASSES, RAIN_THRESHOLDS, compact_hourly
+
+# ---------- RULES ----------
+# (window hours, IMD class): alert when the accumulation over any rolling
+# window exceeds the upper bound of the class below, i.e. reaches the class.
+ALERT_RULES = (
+    (24, 6),   # Heavy, > 64.4 mm in 24 h
+    (24, 7),   # Very Heavy, > 124.4 mm in 24 h
+    (72, 7),   # Very Heavy, > 124.4 mm in 72 h
+    (24, 8),   # Extreme, > 244.4 mm in 24 h
+)
+
+
+def rule_label(window, intensity):
+    return f"{RAIN_CLASSES[intensity]} (> {RAIN_THRESHOLDS[intensity - 1]:g} mm / {window} h)"
+
+
+# ---------- ROLLING ACCUMULATION ----------
+# Every site's hourly series goes into one sites x hours array. One cumulative
+# sum per site row gives every window total as a difference of two entries.
+def stack_hourly(payloads):
+    # Shorter series are zero-padded; `lengths` says where each one ends.
+    compacts = [compact_hourly(p) for p in payloads]
+    lengths = np.array([len(c["precipitation"]) for c in compacts])
+    values = np.zeros((len(compacts), lengths.max()))
+    for i, c in enumerate(compacts):
+        values[i, :lengths[i]] = np.nan_to_num(np.round(c["precipitation"].astype(float), 4))
+    starts = np.array([c["time"][0] for c in compacts], dtype="datetime64[h]")
+    return starts, values, lengths
+
+
+def rolling_sums(values, window):
+    # Totals over the `window` hours ending at each hour; the first hours of
+    # the forecast sum whatever part of the window they have. Rounding drops
+    # the drift of differencing a long running sum, so a window of exactly
+    # 64.4 mm does not count as over 64.4.
+    cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=cumulative[:, 1:])
+    hours = np.arange(1, values.shape[1] + 1)
+    return np.round(cumulative[:, hours] - cumulative[:, np.maximum(hours - window, 0)], 4)
+
+
+# ---------- EVENTS ----------
+# An event is one unbroken run of hours whose window total is over the
+# threshold. Runs are found from the edges of the padded boolean mask, so
+# each site row is scanned once by NumPy rather than hour by hour.
+EVENT_COLUMNS = ["site", "rule", "window_h", "threshold_mm", "onset", "until", "peak_mm", "peak_at"]
+
+
+def alert_events(names, payloads, rules=ALERT_RULES):
+    if not payloads:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    names = np.asarray(names, dtype=object)
+    starts, values, lengths = stack_hourly(payloads)
+    hours = values.shape[1]
+    covered = np.arange(hours) < lengths[:, None]
+    frames = []
+    for window in sorted({w for w, _ in rules}):
+        sums = rolling_sums(values, window)
+        for w, intensity in rules:
+            if w != window:
+                continue
+            threshold = RAIN_THRESHOLDS[intensity - 1]
+            over = (sums > threshold) & covered
+            padded = np.zeros((len(names), hours + 2), dtype=np.int8)
+            padded[:, 1:-1] = over
+            edges = np.diff(padded, axis=1)
+            site, first = np.nonzero(edges == 1)
+            _, end = np.nonzero(edges == -1)
+            if not len(site):
+                continue
+            # Peak of each run: a reduceat over the in-run hours laid end to
+            # end, then the first hour in each run that reaches it.
+            flat = sums.ravel()
+            inside = np.flatnonzero(over.ravel())
+            run_starts = np.searchsorted(inside, site * hours + first)
+            peak = np.maximum.reduceat(flat[inside], run_starts)
+            run = np.searchsorted(run_starts, np.arange(len(inside)), side="right") - 1
+            hits = np.flatnonzero(flat[inside] == peak[run])
+            _, first_hit = np.unique(run[hits], return_index=True)
+            peak_hour = inside[hits[first_hit]] - site * hours
+            frames.append(pd.DataFrame({
+                "site": names[site],
+                "rule": rule_label(window, intensity),
+                "window_h": window,
+                "threshold_mm": threshold,
+                "onset": starts[site] + first,
+                "until": starts[site] + (end - 1),
+                "peak_mm": np.round(peak, 1),
+                "peak_at": starts[site] + peak_hour,
+            }))
+    if not frames:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---------- DEDUPLICATION ----------
+# Each new forecast re-detects the same storms with slightly shifted hours.
+# An event that overlaps a known one for the same site and rule keeps that
+# alert's id; only events with no overlap are new. Known alerts for the
+# checked sites that no longer appear are cleared.
+class AlertBook:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.known = {}
+        self.next_id = 1
+        self.cleared = 0
+
+    def update(self, events, sites):
+        # Returns `events` with an `alert_id` and a `status` of "new",
+        # "updated" (span or peak changed) or "ongoing".
+        events = events.reset_index(drop=True)
+        sites = set(sites)
+        ids, statuses = [], []
+        with self.lock:
+            previous = {k: v for k, v in self.known.items() if v["site"] in sites}
+            current = {k: v for k, v in self.known.items() if v["site"] not in sites}
+            for event in events.itertuples(index=False):
+                entry = {
+                    "site": event.site, "rule": event.rule, "onset": event.onset,
+                    "until": event.until, "peak_mm": event.peak_mm,
+                }
+                match = next(
+                    (alert_id for alert_id, known in previous.items()
+                     if known["site"] == event.site and known["rule"] == event.rule
+                     and known["onset"] <= event.until and event.onset <= known["until"]),
+                    None,
+                )
+                if match is None:
+                    match = self.next_id
+                    self.next_id += 1
+                    statuses.append("new")
+                else:
+                    known = previous.pop(match)
+                    changed = any(known[k] != entry[k] for k in ("onset", "until", "peak_mm"))
+                    statuses.append("updated" if changed else "ongoing")
+                current[match] = entry
+                ids.append(match)
+            self.cleared += len(previous)
+            self.known = current
+        return events.assign(alert_id=ids, status=statuses)
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+import open_meteo
+from forecast_store import DEFAULT_PATH
+
+# ---------- INCREMENTAL DAILY HISTORY ----------
+# Past days never change once the archive has them, so each site keeps its own
+# daily series on disk and only the days after the last stored one are fetched.
+# Days the archive has not filled in yet (null) are not stored and get asked
+# for again on the next refresh.
+class RainHistory:
+    def __init__(self, path=DEFAULT_PATH, fetch_range=open_meteo.fetch_archive_daily):
+        self.fetch_range = fetch_range
+        self.lock = threading.Lock()
+        # A bare filename lives in the working directory, which already exists.
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS daily_rain ("
+            " site TEXT NOT NULL,"
+            " day TEXT NOT NULL,"
+            " precipitation REAL NOT NULL,"
+            " PRIMARY KEY (site, day))"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def site_key(lat, lon):
+        return f"{float(lat)},{float(lon)}"
+
+    def span(self, site):
+        first, last = self.conn.execute(
+            "SELECT MIN(day), MAX(day) FROM daily_rain WHERE site = ?", (site,)
+        ).fetchone()
+        if first is None:
+            return None, None
+        return date.fromisoformat(first), date.fromisoformat(last)
+
+    def missing_ranges(self, site, start, end):
+        first, last = self.span(site)
+        if first is None:
+            return [(start, end)]
+        ranges = []
+        if start < first:
+            ranges.append((start, first - timedelta(days=1)))
+        if last < end:
+            ranges.append((max(last + timedelta(days=1), start), end))
+        return ranges
+
+    def backfill(self, lat, lon, start, end):
+        site = self.site_key(lat, lon)
+        with self.lock:
+            ranges = self.missing_ranges(site, start, end)
+        for range_start, range_end in ranges:
+            rows = self.fetch_range(lat, lon, range_start.isoformat(), range_end.isoformat())
+            with self.lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO daily_rain (site, day, precipitation) VALUES (?, ?, ?)",
+                    [(site, day, value) for day, value in rows if value is not None],
+                )
+                self.conn.commit()
+        return len(ranges)
+
+    def window(self, lat, lon, days, end=None):
+        # Daily totals from `end - days` through `end` inclusive, None where the
+        # archive has no value yet.
+        end = end or date.today()
+        start = end - timedelta(days=days)
+        self.backfill(lat, lon, start, end)
+        with self.lock:
+            stored = dict(self.conn.execute(
+                "SELECT day, precipitation FROM daily_rain WHERE site = ? AND day BETWEEN ? AND ?",
+                (self.site_key(lat, lon), start.isoformat(), end.isoformat()),
+            ).fetchall())
+        return [
+            (day, stored.get(day.isoformat()))
+            for day in (start + timedelta(days=i) for i in range(days + 1))
+        ]
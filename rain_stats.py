@@ -0,0 +1,219 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# ---------- RAIN COLOR SCALE ----------
+def rain_color(val):
+    if val == 0:
+        return "#D3D3D3"  # No Rain
+    elif 0 < val <= 0.04:
+        return "#ADD8E6"  # Trace Rain
+    elif 0.04 < val <= 2.4:
+        return "#A0C4FF"  # Very Light
+    elif 2.4 < val <= 7.5:
+        return "#7FB77E"  # Light
+    elif 7.5 < val <= 35.5:
+        return "#FFD700"  # Moderate
+    elif 35.5 < val <= 64.4:
+        return "#FF8C00"  # Rather Heavy
+    elif 64.4 < val <= 124.4:
+        return "#FF4500"  # Heavy
+    elif 124.4 < val <= 244.4:
+        return "#DC143C"  # Very Heavy
+    else:
+        return "#8B0000"  # Extreme
+
+
+# Same IMD scale as rain_color, as arrays: class i covers
+# (RAIN_THRESHOLDS[i-1], RAIN_THRESHOLDS[i]], class 0 is exactly zero and
+# anything rain_color sends to its else branch (negative, NaN) is Extreme.
+RAIN_THRESHOLDS = np.array([0.0, 0.04, 2.4, 7.5, 35.5, 64.4, 124.4, 244.4])
+RAIN_CLASSES = (
+    "No Rain", "Trace", "Very Light", "Light", "Moderate",
+    "Rather Heavy", "Heavy", "Very Heavy", "Extreme",
+)
+RAIN_COLORS = np.array([
+    "#D3D3D3", "#ADD8E6", "#A0C4FF", "#7FB77E", "#FFD700",
+    "#FF8C00", "#FF4500", "#DC143C", "#8B0000",
+])
+EXTREME = len(RAIN_CLASSES) - 1
+
+
+def rain_class(values):
+    values = np.asarray(values, dtype=float)
+    codes = np.digitize(values, RAIN_THRESHOLDS, right=True)
+    codes[~(values >= 0)] = EXTREME
+    return codes
+
+
+def rain_colors(values):
+    return RAIN_COLORS[rain_class(values)]
+
+
+# ---------- COMPACT HOURLY SERIES ----------
+# Open-Meteo hourly series sit on a fixed one-hour grid, so only the first and
+# last time strings are parsed; the rest of the stamps are start + i hours.
+# Values are kept as float32 with an int16 day offset per hour.
+HOUR = np.timedelta64(1, "h")
+
+
+def compact_hourly(data):
+    times = data["hourly"]["time"]
+    precipitation = np.asarray(data["hourly"]["precipitation"], dtype=np.float32)
+    start = np.datetime64(times[0], "m")
+    if np.datetime64(times[-1], "m") == start + HOUR * (len(times) - 1):
+        stamps = start + HOUR * np.arange(len(times))
+    else:
+        stamps = np.array(times, dtype="datetime64[m]")
+    days = stamps.astype("datetime64[D]")
+    return {
+        "time": stamps.astype("datetime64[s]"),
+        "precipitation": precipitation,
+        "day": (days - days[0]).astype(np.int16),
+        "hour": ((stamps - days) // HOUR).astype(np.int8),
+        "first_day": days[0],
+    }
+
+
+# ---------- HOURLY FRAME ----------
+def hourly_frame(data, compact=None):
+    compact = compact if compact is not None else compact_hourly(data)
+    return pd.DataFrame({
+        "time": compact["time"],
+        "precipitation": compact["precipitation"],
+        "day": compact["day"],
+        "hour": compact["hour"],
+    })
+
+
+# ---------- FORECAST RUN ----------
+# Identifies a forecast by its content, so anything rendered from it can be
+# cached per run and reused until the upstream data actually changes.
+def forecast_run(data):
+    hourly = json.dumps(data["hourly"], separators=(",", ":"), sort_keys=True)
+    return hashlib.sha1(hourly.encode()).hexdigest()[:12]
+
+
+# ---------- AGGREGATES ----------
+# Everything the calendar, sidebar and hourly views need, built in one grouped
+# pass so no view has to rescan the hourly frame per day.
+def build_forecast(data):
+    compact = compact_hourly(data)
+    hourly = hourly_frame(data, compact)
+    # Sums and class boundaries use the decimal values upstream sent, not
+    # their float32 approximations.
+    rain = np.round(compact["precipitation"].astype(np.float64), 4)
+    hourly["wet"] = rain > 0
+    hourly["color"] = pd.Categorical.from_codes(rain_class(rain), RAIN_COLORS)
+
+    by_day = pd.Series(rain).groupby(compact["day"], sort=True)
+    daily = pd.DataFrame({
+        "precipitation": by_day.sum(),
+        "max_hour_rain": by_day.max(),
+        "wet_hours": hourly["wet"].groupby(compact["day"], sort=True).sum(),
+        "hours": by_day.size(),
+    })
+    peak = pd.Series(rain).fillna(0.0).groupby(compact["day"], sort=True).idxmax()
+    daily["max_hour"] = compact["time"][peak.to_numpy()]
+    daily.index = pd.Index(
+        (compact["first_day"] + daily.index.to_numpy()).astype(object), name="date"
+    )
+    # Hourly rows are in time order, so each day is one contiguous slice.
+    daily["start"] = daily["hours"].cumsum() - daily["hours"]
+    daily["week"] = np.arange(len(daily)) // 7 + 1
+    daily["intensity"] = rain_class(daily["precipitation"].to_numpy())
+    daily["color"] = pd.Categorical.from_codes(daily["intensity"].to_numpy(), RAIN_COLORS)
+
+    weekly = daily.groupby("week")["precipitation"].sum()
+
+    return {
+        "run": forecast_run(data),
+        "hourly": hourly,
+        "daily": daily,
+        "weekly": weekly,
+        "total": float(np.nansum(rain)),
+        "memory": int(hourly.memory_usage(deep=True).sum() + daily.memory_usage(deep=True).sum()),
+    }
+
+
+def day_slice(forecast, day):
+    daily = forecast["daily"]
+    start = daily.at[day, "start"]
+    return forecast["hourly"].iloc[start:start + daily.at[day, "hours"]]
+
+
+# ---------- MULTI-SITE MATRIX ----------
+# Reduces every site's hourly series to daily totals and lines them up as one
+# sites x dates array for the overview.
+def site_day_matrix(payloads):
+    # Every site's series goes into one array of (site, date) hours, summed
+    # with one reduceat over the (site, date) boundaries and scattered into a
+    # sites x dates matrix over every date any site covers. Sites whose series
+    # start on different days (a stale payload served next to fresh ones) or
+    # have a day that is not 24 hours long stay under their own dates; a date
+    # a site does not cover is NaN.
+    compacts = [compact_hourly(payload) for payload in payloads]
+    rain = np.concatenate([compact["precipitation"] for compact in compacts]).astype(np.float64)
+    rain = np.nan_to_num(np.round(rain, 4))
+    day = np.concatenate([compact["first_day"] + compact["day"] for compact in compacts])
+    site = np.repeat(np.arange(len(compacts)), [len(compact["day"]) for compact in compacts])
+    boundary = np.ones(len(day), dtype=bool)
+    boundary[1:] = (day[1:] != day[:-1]) | (site[1:] != site[:-1])
+    starts = np.flatnonzero(boundary)
+    dates = np.unique(day[starts])
+    totals = np.full((len(compacts), len(dates)), np.nan)
+    totals[site[starts], np.searchsorted(dates, day[starts])] = np.add.reduceat(rain, starts)
+    return dates, totals
+
+
+def overview_frame(names, payloads):
+    dates, totals = site_day_matrix(payloads)
+    site, day = np.nonzero(~np.isnan(totals))
+    values = totals[site, day]
+    codes = rain_class(values)
+    return pd.DataFrame({
+        "Site": np.asarray(names, dtype=object)[site],
+        "Date": pd.to_datetime(dates[day]),
+        "Rainfall (mm)": values.round(1),
+        "Intensity": np.asarray(RAIN_CLASSES, dtype=object)[codes],
+    })
+
+
+# ---------- ENSEMBLE ----------
+# The ensemble endpoint returns the control run as "precipitation" and every
+# other member as "precipitation_memberNN". All members go into one
+# members x hours array and every daily figure is one reduction over it.
+ENSEMBLE_PERCENTILES = (10, 50, 90)
+
+
+def member_matrix(data):
+    hourly = data["hourly"]
+    names = sorted(key for key in hourly if key == "precipitation" or key.startswith("precipitation_member"))
+    return np.array([hourly[name] for name in names], dtype=float)
+
+
+def build_ensemble(data):
+    compact = compact_hourly(data)
+    members = np.round(member_matrix(data), 4)
+    starts = np.flatnonzero(np.diff(compact["day"], prepend=-1))
+    # members x days; an all-missing day sums to zero, as in build_forecast.
+    totals = np.add.reduceat(np.nan_to_num(members), starts, axis=1)
+    dates = pd.Index((compact["first_day"] + compact["day"][starts]).astype(object), name="date")
+
+    percentiles = np.percentile(totals, ENSEMBLE_PERCENTILES, axis=0)
+    daily = pd.DataFrame({"mean": totals.mean(axis=0)}, index=dates)
+    for q, values in zip(ENSEMBLE_PERCENTILES, percentiles):
+        daily[f"p{q}"] = values
+    # Column RAIN_CLASSES[i] is the share of members at class i or heavier.
+    exceed = (totals[None, :, :] > RAIN_THRESHOLDS[:, None, None]).mean(axis=1)
+    exceedance = pd.DataFrame(exceed.T, index=dates, columns=RAIN_CLASSES[1:])
+    daily["intensity"] = rain_class(daily["mean"].to_numpy())
+
+    return {
+        "run": forecast_run(data),
+        "members": len(members),
+        "daily": daily,
+        "exceedance": exceedance,
+    }
@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+import open_meteo
+from climatology import flag_days
+from rain_stats import build_forecast
+from rain_alerts import alert_events
+from site_registry import load_registry
+
+# Headless forecast engine: fetch and aggregate without a Streamlit session.
+# The dashboards (through dashboard.py) and batch_forecast.py are built on it.
+
+# ---------- SITES ----------
+# Facilities come from the site registry file (sites.csv, or
+# RAINFALL_SITES_PATH), which also answers nearest-site and radius queries.
+SITES = load_registry()
+DEFAULT_PLACES = SITES.places
+
+# GFS, which the dashboards always meant to ask for ("model=gefs" was never a
+# parameter upstream knows). Naming the model also fixes its grid, so sites in
+# one 0.25° cell share a cache entry and a fetch.
+FORECAST_PARAMS = "hourly=precipitation&forecast_days=14&timezone=auto&models=gfs_seamless"
+# GEFS on the ensemble endpoint: the control run plus 30 perturbed members.
+ENSEMBLE_PARAMS = "hourly=precipitation&forecast_days=14&timezone=auto&models=gfs_seamless"
+
+
+# ---------- FETCH ----------
+def fetch_chunks(fetch_bulk, coords, params, size, workers):
+    # Bulk chunks go out in parallel; results are keyed by (lat, lon).
+    sites = open_meteo.unique_coords(coords)
+    chunks = [sites[i:i + size] for i in range(0, len(sites), size)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for payloads in pool.map(lambda chunk: fetch_bulk(chunk, params), chunks):
+            results.update(payloads)
+    return results
+
+
+def fetch_forecasts(coords, params=FORECAST_PARAMS, workers=4):
+    return fetch_chunks(open_meteo.fetch_forecast_bulk, coords, params, open_meteo.BULK_CHUNK_SIZE, workers)
+
+
+def fetch_ensembles(coords, params=ENSEMBLE_PARAMS, workers=2):
+    return fetch_chunks(open_meteo.fetch_ensemble_bulk, coords, params, open_meteo.ENSEMBLE_CHUNK_SIZE, workers)
+
+
+# ---------- AGGREGATE ----------
+def aggregate(payload):
+    return build_forecast(payload)
+
+
+# ---------- SITE TABLES ----------
+def site_tables(name, lat, lon, payload):
+    forecast = aggregate(payload)
+    hourly = forecast["hourly"][["time", "precipitation", "color"]].copy()
+    daily = forecast["daily"].drop(columns=["start"]).rename_axis("date").reset_index()
+    for table in (hourly, daily):
+        table.insert(0, "site", name)
+        table.insert(1, "latitude", lat)
+        table.insert(2, "longitude", lon)
+    # Classes come from the aggregate step, which classifies the exact values
+    # rather than their float32 copies.
+    hourly["intensity"] = forecast["hourly"]["color"].cat.codes.to_numpy()
+    return hourly, daily
+
+
+def forecast_tables(places, payloads, processes=1):
+    # payloads maps (lat, lon) to the Open-Meteo response for that site.
+    jobs = [(name, lat, lon, payloads[(float(lat), float(lon))]) for name, (lat, lon) in places.items()]
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            tables = list(pool.map(site_tables, *zip(*jobs)))
+    else:
+        tables = [site_tables(*job) for job in jobs]
+    hourly = pd.concat([h for h, _ in tables], ignore_index=True)
+    daily = pd.concat([d for _, d in tables], ignore_index=True)
+    return hourly, daily
+
+
+def alert_table(places, payloads):
+    # Rolling-accumulation alerts for every site, from one stacked pass.
+    return alert_events(list(places), [payloads[(float(lat), float(lon))] for lat, lon in places.values()])
+
+
+def add_climate(daily, climatology):
+    # Day-of-year percentile and return-period flags for every row of the
+    # daily table, one climatology per unique location (built if missing).
+    flags = []
+    for (lat, lon), rows in daily.groupby(["latitude", "longitude"], sort=False):
+        climate = climatology.load(lat, lon)
+        flags.append(flag_days(climate, rows["date"], rows["precipitation"]).set_index(rows.index))
+    columns = ["percentile", "return_period", "anomalous"]
+    return daily.join(pd.concat(flags)[columns]) if flags else daily.assign(**{c: None for c in columns})
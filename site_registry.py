@@ -0,0 +1,100 @@
+import csv
+import math
+import os
+
+import numpy as np
+
+# ---------- CONFIG ----------
+# One row per facility: name,latitude,longitude. Names must be unique; several
+# names may share a coordinate.
+SITES_PATH = os.environ.get(
+    "RAINFALL_SITES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sites.csv"),
+)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+# ---------- DISTANCE ----------
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# ---------- REGISTRY ----------
+# Sites are bucketed on a fixed lat/lon grid (`cell` degrees). A radius query
+# only measures haversine distances for sites in the buckets its bounding box
+# touches; nearest() widens a radius query until it has enough sites.
+class SiteRegistry:
+    def __init__(self, sites, cell=1.0):
+        self.places = dict(sites)
+        self.names = np.array(list(self.places), dtype=object)
+        coords = np.array(list(self.places.values()), dtype=float).reshape(-1, 2)
+        self.lat = coords[:, 0]
+        self.lon = coords[:, 1]
+        self.cell = cell
+        self.lon_buckets = int(math.ceil(360 / cell))
+        rows = np.floor((self.lat + 90) / cell).astype(int)
+        cols = np.floor((self.lon + 180) / cell).astype(int) % self.lon_buckets
+        buckets = {}
+        for i, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            buckets.setdefault(key, []).append(i)
+        self.buckets = {key: np.array(ids) for key, ids in buckets.items()}
+
+    @classmethod
+    def from_file(cls, path=SITES_PATH, cell=1.0):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        names = [row["name"].strip() for row in rows]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate site names in {path}: {', '.join(duplicates)}")
+        return cls(((name, (float(row["latitude"]), float(row["longitude"]))) for name, row in zip(names, rows)), cell)
+
+    def __len__(self):
+        return len(self.places)
+
+    def candidates(self, lat, lon, radius_km):
+        # Indices of every site whose bucket overlaps the query's bounding box.
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = lat - dlat, lat + dlat
+        rows = range(int(math.floor((south + 90) / self.cell)), int(math.floor((north + 90) / self.cell)) + 1)
+        widest = math.cos(math.radians(min(89.999, max(abs(south), abs(north)))))
+        if north >= 90 or south <= -90 or radius_km / (KM_PER_DEGREE * widest) >= 180:
+            cols = None
+        else:
+            dlon = radius_km / (KM_PER_DEGREE * widest)
+            cols = {
+                c % self.lon_buckets
+                for c in range(int(math.floor((lon - dlon + 180) / self.cell)), int(math.floor((lon + dlon + 180) / self.cell)) + 1)
+            }
+        if cols is not None and len(rows) * len(cols) < len(self.buckets):
+            hits = [self.buckets[(r, c)] for r in rows for c in cols if (r, c) in self.buckets]
+        else:
+            hits = [ids for (r, c), ids in self.buckets.items() if r in rows and (cols is None or c in cols)]
+        return np.concatenate(hits) if hits else np.empty(0, dtype=int)
+
+    def within(self, lat, lon, radius_km):
+        # [(name, km)] for every site within `radius_km`, nearest first.
+        ids = self.candidates(lat, lon, radius_km)
+        km = haversine_km(lat, lon, self.lat[ids], self.lon[ids])
+        keep = km <= radius_km
+        ids, km = ids[keep], km[keep]
+        order = np.argsort(km, kind="stable")
+        return list(zip(self.names[ids[order]].tolist(), km[order].tolist()))
+
+    def nearest(self, lat, lon, k=1):
+        # [(name, km)] for the `k` closest sites.
+        radius = self.cell * KM_PER_DEGREE
+        while radius < math.pi * EARTH_RADIUS_KM:
+            found = self.within(lat, lon, radius)
+            if len(found) >= min(k, len(self)):
+                return found[:k]
+            radius *= 2
+        return self.within(lat, lon, math.pi * EARTH_RADIUS_KM)[:k]
+
+
+def load_registry(path=SITES_PATH):
+    return SiteRegistry.from_file(path)
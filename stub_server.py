@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Serves recorded Open-Meteo responses so the dashboards and batch tools can run
+# offline:
+#
+#   python stub_server.py --port 8765
+#   OPEN_METEO_FORECAST_URL=http://127.0.0.1:8765/v1/forecast \
+#   OPEN_METEO_ARCHIVE_URL=http://127.0.0.1:8765/v1/archive \
+#   OPEN_METEO_ENSEMBLE_URL=http://127.0.0.1:8765/v1/ensemble \
+#   streamlit run rainfall_dashboard.py
+#
+# Recordings live in fixtures/<endpoint>/<lat>_<lon>.json, with
+# fixtures/<endpoint>/default.json used for any site without its own file.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(endpoint, lat, lon):
+    folder = os.path.join(FIXTURE_DIR, endpoint)
+    for name in (f"{lat}_{lon}.json", "default.json"):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                payload = json.load(f)
+            payload["latitude"], payload["longitude"] = float(lat), float(lon)
+            return payload
+    return None
+
+
+def slice_daily(payload, start_date, end_date):
+    daily = payload.get("daily")
+    if not daily or not start_date or not end_date:
+        return payload
+    keep = [i for i, day in enumerate(daily["time"]) if start_date <= day <= end_date]
+    payload["daily"] = {key: [values[i] for i in keep] for key, values in daily.items()}
+    return payload
+
+
+# Model metadata follows a fixed six-hourly schedule, each run available four
+# hours after initialisation.
+def model_meta(interval=21600, delay=14400):
+    initialised = (int(time.time()) - delay) // interval * interval
+    return {
+        "last_run_initialisation_time": initialised,
+        "last_run_availability_time": initialised + delay,
+        "last_run_modification_time": initialised + delay,
+        "update_interval_seconds": interval,
+        "temporal_resolution_seconds": 3600,
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/static/meta.json"):
+            self.send_json(model_meta())
+            return
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        query = parse_qs(url.query)
+        lats = query.get("latitude", [""])[0].split(",")
+        lons = query.get("longitude", [""])[0].split(",")
+        start_date = query.get("start_date", [None])[0]
+        end_date = query.get("end_date", [None])[0]
+
+        payloads = []
+        for lat, lon in zip(lats, lons):
+            payload = load_fixture(endpoint, lat, lon)
+            if payload is None:
+                self.send_error(404, f"No recording for {endpoint} at {lat},{lon}")
+                return
+            payloads.append(slice_daily(payload, start_date, end_date))
+
+        self.send_json(payloads[0] if len(payloads) == 1 else payloads)
+
+    def send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(host="127.0.0.1", port=8765, verbose=False):
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.verbose = verbose
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded Open-Meteo responses.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    server = serve(args.host, args.port, args.verbose)
+    print(f"Serving fixtures from {FIXTURE_DIR} on http://{args.host}:{args.port}")
+    server.serve_forever()